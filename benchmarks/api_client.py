@@ -0,0 +1,104 @@
+"""Per-request latency of the shared pooled API client against a client per call
+
+Starts a local HTTP/1.1 mock panel and sends REQUESTS sequential GETs, then
+BURSTS bursts of BURST_SIZE concurrent GETs (a list view firing several
+calls), once with a new httpx.AsyncClient per call as RemnaAPI used to do
+and once through the shared client. The mock panel has no TLS, a real panel
+behind HTTPS adds a TLS handshake to every unpooled call.
+
+    python benchmarks/api_client.py [requests] [bursts]
+"""
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+BURSTS = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+BURST_SIZE = 5
+
+NODES = json.dumps({"response": [
+    {"uuid": f"node-{i}", "name": f"Node {i}", "address": f"10.0.0.{i}", "isConnected": True}
+    for i in range(20)
+]}).encode()
+
+class PanelHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately, don't let Nagle hold the body back
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(NODES)))
+        self.end_headers()
+        self.wfile.write(NODES)
+
+    def log_message(self, format, *args):
+        pass
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), PanelHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+# Measure the client alone: no cache, retries or client-side limits
+os.environ["API_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/api"
+os.environ["API_CACHE_ENABLED"] = "false"
+os.environ["API_RETRY_ATTEMPTS"] = "1"
+os.environ["API_RATE_LIMIT"] = "0"
+os.environ["API_CONCURRENCY"] = "0"
+for group in ("USERS", "NODES", "HOSTS", "STATS", "DEFAULT"):
+    os.environ[f"API_GROUP_LIMIT_{group}"] = "0,1,0"
+
+import httpx
+from modules.api import client
+from modules.api.client import RemnaAPI, get_headers
+
+async def unpooled_get(endpoint):
+    async with httpx.AsyncClient(base_url=f"{client.API_BASE_URL}/", headers=get_headers()) as http:
+        response = await http.get(endpoint)
+        response.raise_for_status()
+        return response.json()["response"]
+
+async def pooled_get(endpoint):
+    return await RemnaAPI.get(endpoint)
+
+async def measure(name, get):
+    latencies = []
+    for _ in range(REQUESTS):
+        started = time.perf_counter()
+        await get("nodes")
+        latencies.append(time.perf_counter() - started)
+
+    bursts = []
+    for _ in range(BURSTS):
+        started = time.perf_counter()
+        await asyncio.gather(*(get("nodes") for _ in range(BURST_SIZE)))
+        bursts.append(time.perf_counter() - started)
+
+    latencies.sort()
+    print(
+        f"{name:<22} median {statistics.median(latencies) * 1000:6.2f} ms   "
+        f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.2f} ms   "
+        f"burst of {BURST_SIZE} {statistics.median(bursts) * 1000:6.2f} ms"
+    )
+
+async def main():
+    print(f"{REQUESTS} sequential requests, {BURSTS} bursts of {BURST_SIZE}")
+    await measure("client per call", unpooled_get)
+    await client.init_client()
+    await measure("shared pooled client", pooled_get)
+    await client.close_client()
+    server.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
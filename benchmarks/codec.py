@@ -0,0 +1,110 @@
+"""Decode and encode throughput of the JSON codecs on user list payloads
+
+Generates panel user list responses of 1k, 10k and 100k users, or loads
+recorded responses given as files, and times every installed codec
+(stdlib json, orjson, msgspec) plus the incremental JSONArrayStream
+decoder used for streamed responses.
+
+    python benchmarks/codec.py [recorded response.json ...]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.api.streaming import JSONArrayStream
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+SIZES = (1_000, 10_000, 100_000)
+# Seconds spent per codec and payload
+DURATION = 1.0
+CHUNK = 16384
+
+def make_user(i):
+    return {
+        "uuid": f"00000000-0000-4000-8000-{i:012d}",
+        "shortUuid": f"short{i}",
+        "subscriptionUuid": f"10000000-0000-4000-8000-{i:012d}",
+        "subscriptionUrl": f"https://sub.example.com/{i}",
+        "username": f"user_{i}",
+        "status": "ACTIVE",
+        "usedTrafficBytes": i * 1024,
+        "lifetimeUsedTrafficBytes": i * 4096,
+        "trafficLimitBytes": 100 * 1024 ** 3,
+        "trafficLimitStrategy": "MONTH",
+        "expireAt": "2030-01-01T00:00:00.000Z",
+        "description": None,
+        "tag": None,
+        "telegramId": None,
+        "email": None,
+        "hwidDeviceLimit": 3,
+        "activeUserInbounds": [{"uuid": f"inbound-{i % 4}", "tag": f"VLESS_{i % 4}", "type": "vless"}],
+        "createdAt": "2024-01-01T00:00:00.000Z",
+        "updatedAt": "2024-01-01T00:00:00.000Z",
+    }
+
+def payloads():
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            with open(path, "rb") as file:
+                yield os.path.basename(path), file.read()
+        return
+    for size in SIZES:
+        users = [make_user(i) for i in range(size)]
+        yield f"{size} users", json.dumps({"response": {"users": users, "total": size}}).encode()
+
+def stream_decode(data):
+    text = data.decode()
+    decoder = JSONArrayStream(("response", "users"))
+    items = []
+    for start in range(0, len(text), CHUNK):
+        items.extend(decoder.feed(text[start:start + CHUNK]))
+    return items
+
+def codecs():
+    found = {"json": (json.loads, lambda obj: json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode())}
+    if orjson is not None:
+        found["orjson"] = (orjson.loads, orjson.dumps)
+    if msgspec is not None:
+        found["msgspec"] = (msgspec.json.Decoder().decode, msgspec.json.Encoder().encode)
+    found["JSONArrayStream"] = (stream_decode, None)
+    return found
+
+def rate(function, argument):
+    """Calls per second of a function, run for about DURATION seconds"""
+    calls = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < DURATION or calls < 3:
+        function(argument)
+        calls += 1
+        elapsed = time.perf_counter() - started
+    return calls / elapsed
+
+def main():
+    available = codecs()
+    print(f"codecs: {', '.join(available)}")
+    for name, data in payloads():
+        document = json.loads(data)
+        print(f"\n{name}, {len(data) / 1024 ** 2:.1f} MiB")
+        for codec, (loads, dumps) in available.items():
+            decoded = rate(loads, data)
+            line = f"  {codec:<16} decode {decoded * len(data) / 1024 ** 2:8.1f} MiB/s {1000 / decoded:9.2f} ms"
+            if dumps is not None:
+                encoded = rate(dumps, document)
+                line += f"   encode {encoded * len(data) / 1024 ** 2:8.1f} MiB/s {1000 / encoded:9.2f} ms"
+            print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Concurrency of the panel client over HTTP/1.1 and multiplexed HTTP/2
+
+Starts a local stub panel speaking HTTP/1.1 and cleartext HTTP/2 that
+answers every request after DELAY seconds, like a panel busy with a query.
+Bursts of CONCURRENT requests are sent through RemnaAPI, once over the
+HTTP/1.1 connection pool (API_MAX_CONNECTIONS connections) and once over a
+single HTTP/2 connection. The stub speaks HTTP/2 by prior knowledge, a panel
+behind TLS negotiates it with ALPN instead. Needs `pip install "httpx[http2]"`.
+
+    python benchmarks/http2.py [concurrent requests] [bursts]
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+except ImportError:
+    h2 = None
+
+CONCURRENT = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+BURSTS = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+DELAY = 0.02
+H2_PREFACE = b"PRI * HTTP/2.0"
+
+BODY = json.dumps({"response": [
+    {"uuid": f"node-{i}", "name": f"Node {i}", "address": f"10.0.0.{i}", "isConnected": True}
+    for i in range(20)
+]}).encode()
+
+connections = {"HTTP/1.1": 0, "HTTP/2": 0}
+
+async def serve_http1(reader, writer, buffer):
+    connections["HTTP/1.1"] += 1
+    while True:
+        while b"\r\n\r\n" not in buffer:
+            data = await reader.read(65536)
+            if not data:
+                return
+            buffer += data
+        _, buffer = buffer.split(b"\r\n\r\n", 1)
+        await asyncio.sleep(DELAY)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(BODY)}\r\n\r\n".encode() + BODY
+        )
+        await writer.drain()
+
+async def serve_http2(reader, writer, buffer):
+    connections["HTTP/2"] += 1
+    connection = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+    connection.initiate_connection()
+
+    async def respond(stream_id):
+        await asyncio.sleep(DELAY)
+        connection.send_headers(stream_id, [
+            (":status", "200"), ("content-type", "application/json"), ("content-length", str(len(BODY))),
+        ])
+        connection.send_data(stream_id, BODY, end_stream=True)
+        writer.write(connection.data_to_send())
+
+    while buffer:
+        for event in connection.receive_data(buffer):
+            if isinstance(event, h2.events.RequestReceived):
+                asyncio.create_task(respond(event.stream_id))
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                writer.close()
+                return
+        writer.write(connection.data_to_send())
+        await writer.drain()
+        buffer = await reader.read(65536)
+
+async def serve(reader, writer):
+    buffer = await reader.read(65536)
+    try:
+        if buffer.startswith(H2_PREFACE):
+            await serve_http2(reader, writer, buffer)
+        else:
+            await serve_http1(reader, writer, buffer)
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def main():
+    server = await asyncio.start_server(serve, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    # Measure the transport alone: no cache, retries or client-side limits
+    os.environ["API_BASE_URL"] = f"http://127.0.0.1:{port}/api"
+    os.environ["API_CACHE_ENABLED"] = "false"
+    os.environ["API_RETRY_ATTEMPTS"] = "1"
+    os.environ["API_RATE_LIMIT"] = "0"
+    os.environ["API_CONCURRENCY"] = "0"
+    for group in ("USERS", "NODES", "HOSTS", "STATS", "DEFAULT"):
+        os.environ[f"API_GROUP_LIMIT_{group}"] = "0,1,0"
+
+    import httpx
+    from modules.api import client
+    from modules.api.client import RemnaAPI, get_headers
+
+    transports = {"HTTP/1.1": client._create_client(False)}
+    if h2 is not None:
+        transports["HTTP/2"] = httpx.AsyncClient(
+            base_url=f"{client.API_BASE_URL}/", http1=False, http2=True, headers=get_headers(),
+            limits=httpx.Limits(max_connections=client.API_MAX_CONNECTIONS),
+        )
+    else:
+        print('h2 is not installed, HTTP/2 skipped: pip install "httpx[http2]"')
+
+    print(f"{BURSTS} bursts of {CONCURRENT} requests, {DELAY * 1000:.0f} ms per response")
+    for name, http in transports.items():
+        client._client = http
+        bursts = []
+        for _ in range(BURSTS):
+            started = time.perf_counter()
+            # Distinct parameters, identical GETs in flight would be coalesced into one
+            results = await asyncio.gather(*(RemnaAPI.get("nodes", {"n": i}) for i in range(CONCURRENT)))
+            bursts.append(time.perf_counter() - started)
+            assert all(result is not None for result in results)
+        print(
+            f"{name:<9} burst {statistics.median(bursts) * 1000:7.1f} ms   "
+            f"{CONCURRENT * BURSTS / sum(bursts):7.0f} requests/s   connections {connections[name]}"
+        )
+        await http.aclose()
+
+    server.close()
+    await server.wait_closed()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""RSS of 50k users held as raw API dicts against User models
+
+Each variant runs in its own process: it decodes a generated panel user
+list read from a file COPIES times, as admins each holding their own list
+did, keeps the users as raw dicts or converts them to User models, and
+reports how much the resident set grew. The Python heap still in use is
+measured in another run with tracemalloc: the dicts a model list was
+converted from are freed, but the allocator keeps most of their pages for
+later allocations, so they count in the RSS of the first copy only. Linux
+only, RSS is read from /proc/self/statm.
+
+    python benchmarks/models.py [users] [copies]
+"""
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+USERS = 50_000
+COPIES = 5
+VARIANTS = ("dicts", "models")
+
+def make_user(i):
+    return {
+        "uuid": f"00000000-0000-4000-8000-{i:012d}",
+        "shortUuid": f"short{i}",
+        "subscriptionUuid": f"10000000-0000-4000-8000-{i:012d}",
+        "subscriptionUrl": f"https://sub.example.com/{i}",
+        "username": f"user_{i}",
+        "status": "ACTIVE",
+        "usedTrafficBytes": i * 1024,
+        "lifetimeUsedTrafficBytes": i * 4096,
+        "trafficLimitBytes": 100 * 1024 ** 3,
+        "trafficLimitStrategy": "MONTH",
+        "expireAt": "2030-01-01T00:00:00.000Z",
+        "description": None,
+        "tag": None,
+        "telegramId": None,
+        "email": None,
+        "hwidDeviceLimit": 3,
+        "createdAt": "2024-01-01T00:00:00.000Z",
+        "updatedAt": "2024-01-01T00:00:00.000Z",
+        # Fields the panel sends that the bot does not show
+        "subLastUserAgent": "Happ/1.0",
+        "subLastOpenedAt": "2024-06-01T00:00:00.000Z",
+        "subRevokedAt": None,
+        "onlineAt": "2024-06-01T00:00:00.000Z",
+        "lastTrafficResetAt": None,
+        "activeUserInbounds": [{"uuid": f"inbound-{i % 4}", "tag": f"VLESS_{i % 4}", "type": "vless"}],
+        "lastConnectedNode": {"connectedAt": "2024-06-01T00:00:00.000Z", "nodeName": f"Node {i % 10}"},
+    }
+
+def rss():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+def measure(variant, path, copies, traced):
+    from modules.api import codec
+    from modules.api.models import User
+
+    gc.collect()
+    if traced:
+        tracemalloc.start()
+    before = rss()
+    with open(path, "rb") as file:
+        payload = file.read()
+    held = []
+    for _ in range(copies):
+        users = codec.loads(payload)["response"]["users"]
+        held.append(User.from_list(users) if variant == "models" else users)
+        del users
+    del payload
+    gc.collect()
+    print(tracemalloc.get_traced_memory()[0] if traced else rss() - before)
+
+def run(variant, path, copies, traced):
+    output = subprocess.run(
+        [sys.executable, __file__, "--variant", variant, path, str(copies), "heap" if traced else "rss"],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return int(output.split()[-1])
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--variant":
+        measure(sys.argv[2], sys.argv[3], int(sys.argv[4]), sys.argv[5] == "heap")
+        return
+
+    from modules.api import codec
+
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else USERS
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else COPIES
+    print(f"{users} users, {copies} copies")
+    results = {}
+    grown = {}
+    with tempfile.NamedTemporaryFile(suffix=".json") as file:
+        file.write(codec.dumps({"response": {"users": [make_user(i) for i in range(users)], "total": users}}))
+        file.flush()
+        for variant in VARIANTS:
+            grown[variant] = run(variant, file.name, copies, False)
+            results[variant] = run(variant, file.name, copies, True)
+            print(
+                f"  {variant:<7} RSS +{grown[variant] / 1024 ** 2:6.1f} MiB   heap in use {results[variant] / 1024 ** 2:6.1f} MiB"
+                f"   {results[variant] / (users * copies):5.0f} bytes per user"
+            )
+    print(
+        f"  reduction: RSS {1 - grown['models'] / grown['dicts']:.0%}, "
+        f"heap {1 - results['models'] / results['dicts']:.0%}"
+    )
+
+if __name__ == "__main__":
+    main()
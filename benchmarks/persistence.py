@@ -0,0 +1,95 @@
+"""Event loop blocking of SQLitePersistence against PicklePersistence
+
+Fills the user data of ADMINS admins with a cached user list, then runs
+ROUNDS persistence runs in which one admin's data changed. For each
+backend it reports the time the event loop is blocked by the update
+calls, the time until the change is on disk and the longest loop stall
+seen by a 1 ms ticker.
+
+    python benchmarks/persistence.py [admins] [cached users per admin] [rounds]
+"""
+import asyncio
+import copy
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.ext import PicklePersistence
+from modules.utils.persistence import SQLitePersistence
+
+ADMINS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+CACHED_USERS = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+ROUNDS = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+def make_user_data(admin):
+    users = [
+        {
+            "uuid": f"{admin:08d}-0000-4000-8000-{i:012d}", "username": f"user_{i}", "status": "ACTIVE",
+            "usedTrafficBytes": i * 1024, "trafficLimitBytes": 100 * 1024 ** 3,
+            "expireAt": "2030-01-01T00:00:00.000Z", "description": "x" * 64,
+        }
+        for i in range(CACHED_USERS)
+    ]
+    return {"current_page": 0, "users": users, "current_user": users[0], "clicks": 0}
+
+async def ticker(stalls, stop):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        stalls.append(time.perf_counter() - started - 0.001)
+
+async def run(name, persistence, settle):
+    data = {admin: make_user_data(admin) for admin in range(ADMINS)}
+    for admin, user_data in data.items():
+        await persistence.update_user_data(admin, copy.deepcopy(user_data))
+    await settle()
+
+    blocked = []
+    durable = []
+    stalls = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(ticker(stalls, stop))
+    for round_ in range(ROUNDS):
+        admin = round_ % ADMINS
+        data[admin]["clicks"] += 1
+        # PicklePersistence compares with the object it was given last time
+        changed = copy.deepcopy(data[admin])
+        await asyncio.sleep(0.01)
+        started = time.perf_counter()
+        await persistence.update_user_data(admin, changed)
+        blocked.append(time.perf_counter() - started)
+        await settle()
+        durable.append(time.perf_counter() - started)
+    stop.set()
+    await probe
+    await persistence.flush()
+    print(
+        f"{name:<20} loop blocked {statistics.median(blocked) * 1000:7.2f} ms   "
+        f"on disk {statistics.median(durable) * 1000:7.2f} ms   "
+        f"longest stall {max(stalls) * 1000:7.2f} ms"
+    )
+
+async def main():
+    print(f"{ADMINS} admins, {CACHED_USERS} cached users each, {ROUNDS} rounds")
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_persistence = PicklePersistence(os.path.join(directory, "bot.pickle"))
+
+        async def pickle_settled():
+            pass
+
+        await run("PicklePersistence", pickle_persistence, pickle_settled)
+
+        sqlite_persistence = SQLitePersistence(os.path.join(directory, "bot.sqlite3"))
+
+        async def sqlite_settled():
+            while sqlite_persistence._flush_task is not None:
+                await sqlite_persistence._flush_task
+
+        await run("SQLitePersistence", sqlite_persistence, sqlite_settled)
+
+if __name__ == "__main__":
+    asyncio.run(main())
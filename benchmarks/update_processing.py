@@ -0,0 +1,111 @@
+"""Throughput of concurrent update processing with per-chat ordering
+
+Queues UPDATES synthetic updates from CHATS admins into an Application
+whose handler waits HANDLER_DELAY seconds, like a slow panel call, once
+with the default sequential processing and once with the bot's per-chat
+update processor (UPDATE_CONCURRENCY). Reports updates per second and
+checks that the updates of every chat were handled in the order they
+arrived. A local stand-in answers the Bot API calls, so no token or
+network is needed.
+
+    python benchmarks/update_processing.py [updates] [chats] [handler delay]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Update
+from telegram.ext import Application, TypeHandler
+from telegram.request import BaseRequest
+from modules.config import UPDATE_CONCURRENCY
+from modules.lifecycle import create_update_processor
+
+UPDATES = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+CHATS = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+HANDLER_DELAY = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Benchmark", "username": "benchmark_bot"}
+
+class LocalBotAPI(BaseRequest):
+    """Answers the Bot API calls made while starting the application"""
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, *args, **kwargs):
+        name = url.rsplit("/", 1)[-1]
+        result = BOT_USER if name == "getMe" else True
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+def make_update(update_id, chat_id, bot):
+    return Update.de_json({
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "chat_instance": str(chat_id),
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Admin"},
+            "message": {
+                "message_id": 1,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private", "first_name": "Admin"},
+                "text": "menu",
+            },
+            "data": "list_users",
+        },
+    }, bot)
+
+async def run(name, concurrent_updates):
+    handled = defaultdict(list)
+    done = asyncio.Event()
+    count = 0
+
+    async def slow_handler(update, context):
+        nonlocal count
+        await asyncio.sleep(HANDLER_DELAY)
+        handled[update.effective_chat.id].append(update.update_id)
+        count += 1
+        if count == UPDATES:
+            done.set()
+
+    application = (
+        Application.builder()
+        .token("123456:benchmark")
+        .request(LocalBotAPI())
+        .get_updates_request(LocalBotAPI())
+        .updater(None)
+        .concurrent_updates(concurrent_updates)
+        .build()
+    )
+    application.add_handler(TypeHandler(Update, slow_handler))
+    async with application:
+        await application.start()
+        started = time.perf_counter()
+        for update_id in range(1, UPDATES + 1):
+            await application.update_queue.put(make_update(update_id, update_id % CHATS, application.bot))
+        await done.wait()
+        elapsed = time.perf_counter() - started
+        await application.stop()
+
+    ordered = all(ids == sorted(ids) for ids in handled.values())
+    print(
+        f"{name:<28} {elapsed:6.2f} s   {UPDATES / elapsed:7.1f} updates/s   "
+        f"per-chat order {'kept' if ordered else 'BROKEN'}"
+    )
+    return elapsed
+
+async def main():
+    print(f"{UPDATES} updates from {CHATS} chats, handler takes {HANDLER_DELAY * 1000:.0f} ms")
+    sequential = await run("sequential", False)
+    concurrent = await run(f"per-chat, concurrency {UPDATE_CONCURRENCY}", create_update_processor())
+    print(f"throughput gain {sequential / concurrent:.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
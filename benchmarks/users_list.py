@@ -0,0 +1,119 @@
+"""Memory and first-page latency of the user list with a large panel
+
+Serves USERS generated users from an httpx.MockTransport panel and compares
+fetching the whole list at once, as the user list used to, with opening a
+paginated snapshot that fetches only the first page, and with walking
+every user page by page with UserAPI.iter_users. Client-side rate limits
+are turned off so only fetching and decoding is measured.
+
+    python benchmarks/users_list.py [users] [runs]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Without client-side limits, iter_users would mostly wait for the users rate limit
+os.environ["API_RATE_LIMIT"] = "0"
+os.environ["API_CONCURRENCY"] = "0"
+os.environ["API_GROUP_LIMIT_USERS"] = "0,1,0"
+
+import httpx
+from modules.api import client, codec
+from modules.api.client import RemnaAPI
+from modules.api.models import decode_users_page
+from modules.api.snapshots import user_snapshots
+from modules.api.users import UserAPI
+from modules.handlers.user_handlers import USERS_PER_PAGE
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+RUNS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+ITER_PAGE_SIZE = 500
+
+def make_user(i):
+    return {
+        "uuid": f"00000000-0000-4000-8000-{i:012d}",
+        "shortUuid": f"short{i}",
+        "subscriptionUuid": f"10000000-0000-4000-8000-{i:012d}",
+        "subscriptionUrl": f"https://sub.example.com/{i}",
+        "username": f"user_{i}",
+        "status": "ACTIVE",
+        "usedTrafficBytes": i * 1024,
+        "lifetimeUsedTrafficBytes": i * 4096,
+        "trafficLimitBytes": 100 * 1024 ** 3,
+        "trafficLimitStrategy": "MONTH",
+        "expireAt": "2030-01-01T00:00:00.000Z",
+        "description": None,
+        "tag": None,
+        "telegramId": None,
+        "email": None,
+        "hwidDeviceLimit": 3,
+        "createdAt": "2024-01-01T00:00:00.000Z",
+        "updatedAt": "2024-01-01T00:00:00.000Z",
+    }
+
+def make_panel():
+    users = [make_user(i) for i in range(USERS)]
+    everything = codec.dumps({"response": {"users": users, "total": USERS}})
+
+    def handler(request):
+        if "start" not in request.url.params:
+            return httpx.Response(200, content=everything, headers={"content-type": "application/json"})
+        start = int(request.url.params["start"])
+        size = int(request.url.params["size"])
+        page = {"response": {"users": users[start:start + size], "total": USERS}}
+        return httpx.Response(200, content=codec.dumps(page), headers={"content-type": "application/json"})
+
+    return handler
+
+async def measure(name, fetch):
+    latencies = []
+    for _ in range(RUNS):
+        client._cache.invalidate(("users",))
+        started = time.perf_counter()
+        await fetch()
+        latencies.append(time.perf_counter() - started)
+
+    # Memory is traced in a separate run, tracing slows every allocation down
+    client._cache.invalidate(("users",))
+    tracemalloc.start()
+    result = await fetch()
+    retained = tracemalloc.get_traced_memory()[0]
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    print(
+        f"{name:<20} time {statistics.median(latencies) * 1000:8.1f} ms   "
+        f"peak {peak / 1024 ** 2:7.1f} MiB   retained {retained / 1024 ** 2:7.1f} MiB"
+    )
+
+async def full_list():
+    return await RemnaAPI.get("users", decode=decode_users_page)
+
+async def snapshot_page():
+    snapshot = await user_snapshots.open(USERS_PER_PAGE)
+    page = await user_snapshots.page(snapshot, 0)
+    user_snapshots.release(snapshot.id)
+    return page
+
+async def walk_users():
+    count = 0
+    async for _ in UserAPI.iter_users(ITER_PAGE_SIZE):
+        count += 1
+    assert count == USERS, count
+    return count
+
+async def main():
+    client._client = httpx.AsyncClient(base_url="http://panel/api/", transport=httpx.MockTransport(make_panel()))
+    print(f"{USERS} users, {RUNS} runs, codec {codec.CODEC}")
+    await measure("whole list", full_list)
+    await measure("paginated snapshot", snapshot_page)
+    await measure("iter_users, all", walk_users)
+    await client._client.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
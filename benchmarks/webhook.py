@@ -0,0 +1,134 @@
+"""End-to-end handler latency of the webhook listener
+
+Starts the bot's webhook listener on localhost, configured like
+BOT_MODE=webhook through webhook_settings(), with the update processor of
+the bot and a local stand-in for the Bot API, so no token or network is
+needed. Synthetic message updates are posted with the secret token
+header, first one at a time and then in bursts from BURST_CHATS chats, and
+the time from sending the POST until the handler runs is reported. A
+request with a wrong secret token must be rejected with 403. Needs the
+webhooks extra of python-telegram-bot (tornado).
+
+    python benchmarks/webhook.py [updates] [bursts]
+"""
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+UPDATES = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+BURSTS = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+BURST_CHATS = 20
+SECRET_TOKEN = "benchmark-secret"
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+PORT = free_port()
+os.environ.update({
+    "BOT_MODE": "webhook",
+    "WEBHOOK_URL": f"http://127.0.0.1:{PORT}",
+    "WEBHOOK_LISTEN": "127.0.0.1",
+    "WEBHOOK_PORT": str(PORT),
+    "WEBHOOK_PATH": "telegram",
+    "WEBHOOK_SECRET_TOKEN": SECRET_TOKEN,
+})
+
+import httpx
+from telegram import Update
+from telegram.ext import Application, TypeHandler
+from telegram.request import BaseRequest
+from modules.lifecycle import create_update_processor, webhook_settings
+
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Benchmark", "username": "benchmark_bot"}
+
+class LocalBotAPI(BaseRequest):
+    """Answers the Bot API calls made while starting and stopping the webhook"""
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, *args, **kwargs):
+        name = url.rsplit("/", 1)[-1]
+        result = BOT_USER if name == "getMe" else True
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+def make_update(update_id, chat_id):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": "Admin"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Admin"},
+            "text": "/start",
+        },
+    }
+
+async def main():
+    handled = {}
+
+    async def record(update, context):
+        handled[update.update_id].set_result(time.perf_counter())
+
+    application = (
+        Application.builder()
+        .token("123456:benchmark")
+        .request(LocalBotAPI())
+        .get_updates_request(LocalBotAPI())
+        .concurrent_updates(create_update_processor())
+        .build()
+    )
+    application.add_handler(TypeHandler(Update, record))
+    settings = webhook_settings()
+    url = f"http://127.0.0.1:{PORT}/{settings['url_path']}"
+    headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET_TOKEN}
+
+    async with application:
+        await application.updater.start_webhook(**settings)
+        await application.start()
+        next_id = 0
+
+        async def post(http, chat_id):
+            nonlocal next_id
+            next_id += 1
+            update_id = next_id
+            handled[update_id] = asyncio.get_running_loop().create_future()
+            started = time.perf_counter()
+            response = await http.post(url, json=make_update(update_id, chat_id), headers=headers)
+            response.raise_for_status()
+            return await handled.pop(update_id) - started
+
+        async with httpx.AsyncClient() as http:
+            rejected = await http.post(
+                url, json=make_update(0, 1), headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"}
+            )
+            print(f"wrong secret token: HTTP {rejected.status_code}")
+
+            sequential = [await post(http, 1) for _ in range(UPDATES)]
+            bursts = []
+            for _ in range(BURSTS):
+                bursts.extend(await asyncio.gather(*(post(http, chat_id) for chat_id in range(BURST_CHATS))))
+
+        await application.updater.stop()
+        await application.stop()
+
+    for name, latencies in (("one at a time", sequential), (f"bursts of {BURST_CHATS} chats", bursts)):
+        latencies.sort()
+        print(
+            f"{name:<20} median {statistics.median(latencies) * 1000:6.2f} ms   "
+            f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.2f} ms   ({len(latencies)} updates)"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,6 +5,12 @@ from telegram.ext import Application
 
 # Import modules
 from modules.handlers.conversation_handler import create_conversation_handler
+from modules.handlers.status_handlers import create_command_handlers
+from modules.config import BOT_MODE
+from modules.lifecycle import (
+    post_init, post_shutdown, create_bot_request, create_update_processor, create_persistence,
+    webhook_settings
+)
 
 # Enable logging
 logging.basicConfig(
@@ -34,15 +40,34 @@ def main():
         logger.warning("ADMIN_USER_IDS environment variable is not set. No users will be able to use the bot.")
     
     # Create the Application
-    application = Application.builder().token(bot_token).build()
+    application = (
+        Application.builder()
+        .token(bot_token)
+        .request(create_bot_request())
+        .concurrent_updates(create_update_processor())
+        .persistence(create_persistence())
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     
     # Create and add conversation handler
     conv_handler = create_conversation_handler()
     application.add_handler(conv_handler)
+    application.add_handlers(create_command_handlers())
     
     # Start the Bot
-    logger.info("Starting bot...")
-    application.run_polling()
+    if BOT_MODE == "webhook":
+        try:
+            settings = webhook_settings()
+        except ValueError as e:
+            logger.error(str(e))
+            return
+        logger.info(f"Starting bot with a webhook on {settings['listen']}:{settings['port']}/{settings['url_path']}...")
+        application.run_webhook(**settings)
+    else:
+        logger.info("Starting bot...")
+        application.run_polling()
 
 if __name__ == '__main__':
     main()
@@ -1,10 +1,287 @@
+import asyncio
+import hashlib
 import httpx
 import logging
-import json
-from modules.config import API_BASE_URL, API_TOKEN
+import random
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from modules.api import codec
+from modules.api.scheduling import RequestScheduler, INTERACTIVE, BACKGROUND
+from modules.api.streaming import JSONArrayStream
+from modules.utils.metrics import REGISTRY, SIZE_BUCKETS
+from modules.utils.tracing import span, record_span
+from modules.config import (
+    API_BASE_URL, API_TOKEN,
+    API_MAX_CONNECTIONS, API_MAX_KEEPALIVE_CONNECTIONS, API_KEEPALIVE_EXPIRY,
+    API_TIMEOUT, API_CONNECT_TIMEOUT, API_HTTP2,
+    API_RETRY_ATTEMPTS, API_RETRY_BACKOFF_BASE, API_RETRY_BACKOFF_MAX,
+    API_CIRCUIT_FAILURE_THRESHOLD, API_CIRCUIT_RESET_TIMEOUT, API_CIRCUIT_HALF_OPEN_PROBES,
+    API_RATE_LIMIT, API_RATE_BURST, API_CONCURRENCY, API_GROUP_LIMITS, API_INTERACTIVE_RESERVE,
+    API_CACHE_ENABLED, API_CACHE_MAX_ENTRIES, API_CACHE_TTL
+)
 
 logger = logging.getLogger(__name__)
 
+# Shared client, created in the Application post_init hook
+_client = None
+
+# Cached endpoints affected by a write to each resource
+CACHE_INVALIDATION = {
+    "users": ("users", "inbounds", "system/stats"),
+    "hosts": ("hosts",),
+    "nodes": ("nodes", "inbounds", "system/stats"),
+    "inbounds": ("inbounds", "users", "nodes"),
+    "xray": ("inbounds",),
+}
+# Callbacks run with the invalidated prefixes after a write, for data kept outside the response cache
+_invalidation_hooks = []
+
+# Transient failures worth retrying
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+RETRY_EXCEPTIONS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+# POST endpoints that are safe to send more than once
+IDEMPOTENT_POST_ENDPOINTS = re.compile(
+    r"^(?:(?:users|nodes|hosts)/[^/]+/actions/(?:enable|disable)"
+    r"|users/[^/]+/actions/(?:reset-traffic|activate-all-inbounds)"
+    r"|hosts/bulk/(?:enable|disable|set-inbound|set-port))$"
+)
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the panel is considered down"""
+
+class StreamError(Exception):
+    """Raised by a streamed GET that failed or ended before the whole array was received"""
+
+class CircuitBreaker:
+    """Fail fast while the panel is unreachable
+
+    Closed: requests pass and consecutive failures are counted.
+    Open: requests fail immediately until the reset timeout has passed.
+    Half-open: a limited number of probe requests are let through; the
+    first success closes the circuit, a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold, reset_timeout, half_open_probes):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self.opened_at = None
+        self._probes = 0
+
+    def allow(self):
+        """Check whether a request may be sent now"""
+        if self.failure_threshold <= 0 or self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._probes = 0
+            logger.info("Panel circuit half-open, probing the panel")
+        if self._probes >= self.half_open_probes:
+            self.rejected += 1
+            return False
+        self._probes += 1
+        return True
+
+    def record_success(self):
+        """Register a request that reached a working panel"""
+        if self.state != self.CLOSED:
+            logger.info("Panel circuit closed, the panel is reachable again")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probes = 0
+
+    def record_failure(self):
+        """Register a request that failed because of the panel"""
+        self.failures += 1
+        if self.state == self.HALF_OPEN or (
+            self.state == self.CLOSED and 0 < self.failure_threshold <= self.failures
+        ):
+            self._open()
+
+    def release(self):
+        """Register a request that ended without telling anything about the panel"""
+        if self.state == self.HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def retry_in(self):
+        """Seconds left until the next probe while open"""
+        if self.state != self.OPEN:
+            return 0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def _open(self):
+        if self.state == self.CLOSED:
+            self.trips += 1
+        logger.warning(
+            f"Panel circuit open after {self.failures} consecutive failures, "
+            f"failing fast for {self.reset_timeout:.0f}s"
+        )
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self._probes = 0
+
+    def stats(self):
+        """Get breaker state and counters"""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_in": self.retry_in(),
+        }
+
+_breaker = CircuitBreaker(API_CIRCUIT_FAILURE_THRESHOLD, API_CIRCUIT_RESET_TIMEOUT, API_CIRCUIT_HALF_OPEN_PROBES)
+
+class CacheEntry:
+    """Cached GET response with the validators needed to revalidate it"""
+
+    __slots__ = ("value", "etag", "last_modified", "digest", "expires_at")
+
+    def __init__(self, value, etag=None, last_modified=None, digest=None):
+        self.value = value
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.expires_at = 0.0
+
+    def conditional_headers(self):
+        """Headers asking the panel to answer 304 if the response is unchanged"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class ResponseCache:
+    """Bounded TTL cache for GET responses with LRU eviction
+
+    Expired entries are kept until evicted so their validators can be
+    used to revalidate them with a conditional request.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # Bumped on every invalidation so responses fetched before a write are not stored
+        self.generation = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """Get a fresh cached value or None"""
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at < time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def entry(self, key):
+        """Get the cached entry, fresh or expired, or None"""
+        return self._entries.get(key)
+
+    def set(self, key, entry, ttl, generation):
+        """Store an entry unless the cache was invalidated since the request started"""
+        if generation != self.generation:
+            return
+        entry.expires_at = time.monotonic() + ttl
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, prefixes):
+        """Drop all entries whose endpoint starts with one of the prefixes"""
+        self.generation += 1
+        for key in list(self._entries):
+            endpoint = key[0]
+            if any(endpoint == p or endpoint.startswith(f"{p}/") for p in prefixes):
+                del self._entries[key]
+
+    def clear(self):
+        """Drop all entries"""
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self):
+        """Get cache counters"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+_cache = ResponseCache(API_CACHE_MAX_ENTRIES)
+
+_scheduler = RequestScheduler(
+    API_RATE_LIMIT, API_RATE_BURST, API_CONCURRENCY, API_GROUP_LIMITS, API_INTERACTIVE_RESERVE
+)
+
+# Identical GET requests currently in flight, shared between concurrent callers
+_inflight = {}
+
+# Path segments replaced by placeholders in metric labels
+UUID_SEGMENT = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+
+API_LATENCY = REGISTRY.histogram(
+    "remnawave_api_request_duration_seconds", "Panel API request latency", ("method", "endpoint")
+)
+API_RESPONSE_SIZE = REGISTRY.histogram(
+    "remnawave_api_response_size_bytes", "Panel API response body size", ("method", "endpoint"), SIZE_BUCKETS
+)
+API_RESPONSES = REGISTRY.counter(
+    "remnawave_api_responses_total", "Panel API responses by status code", ("method", "endpoint", "status")
+)
+API_ERRORS = REGISTRY.counter(
+    "remnawave_api_errors_total", "Panel API requests that got no response", ("method", "endpoint", "error")
+)
+API_RETRIES = REGISTRY.counter(
+    "remnawave_api_retries_total", "Panel API requests sent again after a transient failure", ("method", "endpoint")
+)
+API_RETRIES_EXHAUSTED = REGISTRY.counter(
+    "remnawave_api_retries_exhausted_total", "Panel API requests that failed after all retries", ("method", "endpoint")
+)
+API_COALESCED = REGISTRY.counter(
+    "remnawave_api_coalesced_total", "GET requests by whether they joined an identical request in flight", ("result",)
+)
+API_REVALIDATED = REGISTRY.counter(
+    "remnawave_api_revalidated_total", "Cached GET responses confirmed unchanged by the panel", ("result",)
+)
+REGISTRY.counter(
+    "remnawave_api_cache_lookups_total", "Response cache lookups", ("result",),
+    function=lambda: {("hit",): _cache.hits, ("miss",): _cache.misses}
+)
+REGISTRY.gauge("remnawave_api_cache_entries", "Responses held in the cache", function=lambda: len(_cache._entries))
+REGISTRY.gauge(
+    "remnawave_api_circuit_state", "Panel circuit breaker state (0 closed, 1 half-open, 2 open)",
+    function=lambda: (CircuitBreaker.CLOSED, CircuitBreaker.HALF_OPEN, CircuitBreaker.OPEN).index(_breaker.state)
+)
+REGISTRY.counter(
+    "remnawave_api_circuit_rejected_total", "Requests failed fast by the circuit breaker",
+    function=lambda: _breaker.rejected
+)
+REGISTRY.gauge(
+    "remnawave_api_active_requests", "Panel requests currently sent",
+    function=lambda: _scheduler.stats()["global"]["active"]
+)
+REGISTRY.gauge(
+    "remnawave_api_queued_requests", "Panel requests waiting for a slot", ("lane",),
+    function=lambda: {(lane,): stats["queued"] for lane, stats in _scheduler.lane_stats().items()}
+)
+
 def get_headers():
     """Get headers for API requests"""
     return {
@@ -12,168 +289,456 @@ def get_headers():
         "Content-Type": "application/json"
     }
 
+def _http2_available():
+    """Check whether HTTP/2 can be used for the panel connection"""
+    if not API_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("API_HTTP2 is enabled but the h2 package is not installed, falling back to HTTP/1.1")
+        return False
+    return True
+
+def _create_client(http2=False):
+    """Create a pooled HTTP client for the panel API"""
+    # With HTTP/2 the protocol is negotiated via ALPN, so servers without
+    # HTTP/2 support transparently keep using HTTP/1.1
+    return httpx.AsyncClient(
+        base_url=f"{API_BASE_URL}/",
+        http2=http2,
+        headers=get_headers(),
+        limits=httpx.Limits(
+            max_connections=API_MAX_CONNECTIONS,
+            max_keepalive_connections=API_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=API_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(API_TIMEOUT, connect=API_CONNECT_TIMEOUT),
+    )
+
+async def init_client():
+    """Open the shared API client"""
+    global _client
+    if _client is None or _client.is_closed:
+        http2 = _http2_available()
+        _client = _create_client(http2)
+        logger.info(
+            f"API client started (max connections: {API_MAX_CONNECTIONS}, "
+            f"HTTP/2: {'on' if http2 else 'off'})"
+        )
+    return _client
+
+async def close_client():
+    """Close the shared API client"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("API client closed")
+
+def get_client():
+    """Get the shared API client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client(_http2_available())
+    return _client
+
+def on_invalidate(hook):
+    """Register a callback run with the invalidated endpoint prefixes after each write"""
+    _invalidation_hooks.append(hook)
+
+def get_coalescing_stats():
+    """Get GET request coalescing counters"""
+    return {
+        "hits": API_COALESCED.get(result="hit"),
+        "misses": API_COALESCED.get(result="miss"),
+        "in_flight": len(_inflight),
+    }
+
+def get_cache_stats():
+    """Get response cache counters"""
+    return {
+        **_cache.stats(),
+        "not_modified": API_REVALIDATED.get(result="not_modified"),
+        "unchanged": API_REVALIDATED.get(result="unchanged"),
+    }
+
+def get_retry_stats():
+    """Get request retry counters"""
+    return {"retries": API_RETRIES.total(), "exhausted": API_RETRIES_EXHAUSTED.total()}
+
+def endpoint_template(endpoint):
+    """Replace identifiers in an endpoint path with placeholders, e.g. users/{uuid}"""
+    segments = endpoint.split("/")
+    for i, segment in enumerate(segments):
+        if i > 0 and segments[i - 1].startswith("by-"):
+            segments[i] = "{" + segments[i - 1][3:] + "}"
+        elif UUID_SEGMENT.match(segment):
+            segments[i] = "{uuid}"
+        elif segment.isdigit():
+            segments[i] = "{id}"
+    return "/".join(segments)
+
+def _observe(method, endpoint, started, response=None, error=None, size=None):
+    """Record the metrics of one request to the panel"""
+    template = endpoint_template(endpoint)
+    API_LATENCY.observe(time.perf_counter() - started, method=method, endpoint=template)
+    if response is not None:
+        API_RESPONSES.inc(method=method, endpoint=template, status=response.status_code)
+        if size is None:
+            size = len(response.content)
+        API_RESPONSE_SIZE.observe(size, method=method, endpoint=template)
+    elif error is not None:
+        if isinstance(error, httpx.TimeoutException):
+            kind = "timeout"
+        elif isinstance(error, httpx.ConnectError):
+            kind = "connect"
+        else:
+            kind = type(error).__name__
+        API_ERRORS.inc(method=method, endpoint=template, error=kind)
+
+def get_breaker_stats():
+    """Get circuit breaker state and counters"""
+    return _breaker.stats()
+
+def get_scheduler_stats():
+    """Get active, queued and throttled requests per endpoint group"""
+    return _scheduler.stats()
+
+def get_priority_stats():
+    """Get queue depth and wait times per priority lane"""
+    return _scheduler.lane_stats()
+
+def _is_retryable(method, endpoint):
+    """Check whether a request can be repeated without side effects"""
+    if method in ("GET", "PUT", "DELETE"):
+        return True
+    return method == "POST" and IDEMPOTENT_POST_ENDPOINTS.match(endpoint) is not None
+
+def _retry_after(response):
+    """Get the delay in seconds requested by a Retry-After header"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def _backoff(attempt):
+    """Exponential backoff with full jitter for the given attempt number"""
+    return random.uniform(0, min(API_RETRY_BACKOFF_MAX, API_RETRY_BACKOFF_BASE * 2 ** (attempt - 1)))
+
+def _request_key(endpoint, params):
+    """Build a hashable key identifying a GET request"""
+    return (endpoint, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())))
+
 class RemnaAPI:
     """API client for Remnawave API"""
-    
+
     @staticmethod
-    async def get(endpoint, params=None):
-        """Make a GET request to the API"""
+    async def _request(method, endpoint, params=None, data=None, decode=None, priority=INTERACTIVE,
+                       conditional=False, previous=None):
+        """Send a request through the shared client and unwrap the response
+
+        With ``conditional`` a CacheEntry is returned instead of the bare
+        result. The request is made conditional on the ``previous`` entry,
+        whose decoded value is reused when the panel answers 304 or sends
+        the same body again.
+        """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{API_BASE_URL}/{endpoint}",
-                    headers=get_headers(),
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if data is not None and debug:
+                # Log request data for debugging
+                logger.debug(f"{method} request to {endpoint} with data: {codec.dumps_pretty(data)}")
+
+            with span(f"api {method} {endpoint_template(endpoint)}", priority=priority) as api_span:
+                response = await RemnaAPI._send(
+                    method,
+                    endpoint,
                     params=params,
+                    content=codec.dumps(data) if data is not None else None,
+                    headers=previous.conditional_headers() if previous is not None else None,
+                    priority=priority,
                 )
-                response.raise_for_status()
-                json_response = response.json()
-                return json_response.get("response") if isinstance(json_response, dict) else json_response
-        except httpx.HTTPStatusError as e:
-            logger.error(f"API GET error: {endpoint} - {str(e)}")
-            if e.response is not None:
-                logger.error(f"Response: {e.response.status_code} - {e.response.text}")
-            return None
-        except httpx.RequestError as e:
-            logger.error(f"API GET request error: {endpoint} - {str(e)}")
-            return None
-        except Exception as e:
-            logger.error(f"Unexpected error in GET {endpoint}: {str(e)}")
-            return None
-    
-    @staticmethod
-    async def post(endpoint, data=None):
-        """Make a POST request to the API"""
-        try:
-            # Log request data for debugging
-            logger.debug(f"POST request to {endpoint} with data: {json.dumps(data, indent=2)}")
-
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{API_BASE_URL}/{endpoint}",
-                    headers=get_headers(),
-                    json=data,
-                )
+                api_span.set("status", response.status_code)
 
-            # Log response status and content for debugging
-            logger.debug(f"Response status: {response.status_code}")
-            logger.debug(f"Response content: {response.text[:500]}...")  # Log first 500 chars to avoid huge logs
+            if method != "GET" and debug:
+                # Log response status and content for debugging
+                logger.debug(f"Response status: {response.status_code}")
+                logger.debug(f"Response content: {response.text[:500]}...")  # Log first 500 chars to avoid huge logs
+
+            if conditional and previous is not None and response.status_code == 304:
+                API_REVALIDATED.inc(result="not_modified")
+                return previous
 
             response.raise_for_status()
-            json_response = response.json()
-            return json_response.get("response") if isinstance(json_response, dict) else json_response
+            digest = None
+            if conditional:
+                digest = hashlib.blake2b(response.content, digest_size=16).digest()
+                if previous is not None and digest == previous.digest:
+                    # Same body as before, skip decoding and keep the same object
+                    API_REVALIDATED.inc(result="unchanged")
+                    previous.etag = response.headers.get("ETag")
+                    previous.last_modified = response.headers.get("Last-Modified")
+                    return previous
+
+            json_response = codec.loads(response.content)
+            result = json_response.get("response") if isinstance(json_response, dict) else json_response
+            if decode and result is not None:
+                result = decode(result)
+            if conditional:
+                return CacheEntry(
+                    result,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    digest=digest,
+                )
+            return result
         except httpx.HTTPStatusError as e:
-            logger.error(f"API POST error: {endpoint} - {str(e)}")
+            logger.error(f"API {method} error: {endpoint} - {str(e)}")
             if e.response is not None:
                 logger.error(f"Response: {e.response.status_code} - {e.response.text}")
                 try:
-                    error_json = e.response.json()
+                    error_json = codec.loads(e.response.content)
                     if "message" in error_json:
                         logger.error(f"API error message: {error_json['message']}")
                 except Exception:
                     pass
             return None
         except httpx.RequestError as e:
-            logger.error(f"API POST request error: {endpoint} - {str(e)}")
+            logger.error(f"API {method} request error: {endpoint} - {str(e)}")
+            return None
+        except CircuitOpenError as e:
+            logger.warning(f"API {method} skipped: {endpoint} - {str(e)}")
             return None
         except Exception as e:
-            logger.error(f"Unexpected error in POST {endpoint}: {str(e)}")
+            logger.error(f"Unexpected error in {method} {endpoint}: {str(e)}")
             return None
-    
+
     @staticmethod
-    async def patch(endpoint, data=None):
-        """Make a PATCH request to the API"""
+    async def _send(method, endpoint, params=None, content=None, headers=None, priority=INTERACTIVE):
+        """Send a request through the circuit breaker"""
+        if not _breaker.allow():
+            raise CircuitOpenError(f"panel unavailable, next attempt in {_breaker.retry_in():.0f}s")
         try:
-            # Логируем данные запроса для отладки
-            logger.debug(f"PATCH request to {endpoint} with data: {json.dumps(data, indent=2)}")
-
-            async with httpx.AsyncClient() as client:
-                response = await client.patch(
-                    f"{API_BASE_URL}/{endpoint}",
-                    headers=get_headers(),
-                    json=data,
-                )
-            response.raise_for_status()
-            json_response = response.json()
-            return json_response.get("response") if isinstance(json_response, dict) else json_response
-        except httpx.HTTPStatusError as e:
-            logger.error(f"API PATCH error: {endpoint} - {str(e)}")
-            if e.response is not None:
-                logger.error(f"Response: {e.response.status_code} - {e.response.text}")
-            return None
-        except httpx.RequestError as e:
-            logger.error(f"API PATCH request error: {endpoint} - {str(e)}")
-            return None
-        except Exception as e:
-            logger.error(f"Unexpected error in PATCH {endpoint}: {str(e)}")
-            return None
+            response = await RemnaAPI._send_with_retries(
+                method, endpoint, params=params, content=content, headers=headers, priority=priority
+            )
+        except RETRY_EXCEPTIONS:
+            _breaker.record_failure()
+            raise
+        except BaseException:
+            _breaker.release()
+            raise
+        if response.status_code >= 500:
+            _breaker.record_failure()
+        else:
+            _breaker.record_success()
+        return response
 
     @staticmethod
-    async def put(endpoint, data=None):
-        """Make a PUT request to the API"""
+    async def _send_with_retries(method, endpoint, params=None, content=None, headers=None, priority=INTERACTIVE):
+        """Send a request, retrying transient failures of idempotent requests"""
+        attempts = API_RETRY_ATTEMPTS if _is_retryable(method, endpoint) else 1
+        attempt = 1
+        while True:
+            try:
+                async with _scheduler.slot(endpoint, priority):
+                    started = time.perf_counter()
+                    try:
+                        response = await get_client().request(
+                            method, endpoint, params=params, content=content, headers=headers
+                        )
+                    except httpx.RequestError as e:
+                        _observe(method, endpoint, started, error=e)
+                        raise
+                    _observe(method, endpoint, started, response=response)
+            except RETRY_EXCEPTIONS as e:
+                if attempt >= attempts:
+                    if attempts > 1:
+                        API_RETRIES_EXHAUSTED.inc(method=method, endpoint=endpoint_template(endpoint))
+                    raise
+                reason = type(e).__name__
+                delay = _backoff(attempt)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempts == 1:
+                    return response
+                if attempt >= attempts:
+                    API_RETRIES_EXHAUSTED.inc(method=method, endpoint=endpoint_template(endpoint))
+                    return response
+                reason = f"HTTP {response.status_code}"
+                delay = _retry_after(response)
+                if delay is None:
+                    delay = _backoff(attempt)
+                elif delay > API_RETRY_BACKOFF_MAX:
+                    # Don't hold the handler for longer than the configured maximum
+                    logger.warning(f"API {method} {endpoint}: {reason}, Retry-After {delay:.0f}s is too long, giving up")
+                    API_RETRIES_EXHAUSTED.inc(method=method, endpoint=endpoint_template(endpoint))
+                    return response
+
+            API_RETRIES.inc(method=method, endpoint=endpoint_template(endpoint))
+            logger.warning(
+                f"API {method} {endpoint}: {reason}, retry {attempt}/{attempts - 1} in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    async def _write(method, endpoint, params=None, data=None, priority=INTERACTIVE):
+        """Send a mutating request and invalidate cached reads it affects"""
         try:
-            # Log request data for debugging
-            logger.debug(f"PUT request to {endpoint} with data: {json.dumps(data, indent=2)}")
+            return await RemnaAPI._request(method, endpoint, params=params, data=data, priority=priority)
+        finally:
+            prefixes = CACHE_INVALIDATION.get(endpoint.split("/", 1)[0])
+            if prefixes:
+                _cache.invalidate(prefixes)
+                for hook in _invalidation_hooks:
+                    hook(prefixes)
 
-            response = requests.put(f"{API_BASE_URL}/{endpoint}", headers=get_headers(), json=data)
-            response.raise_for_status()
-            json_response = response.json()
-            return json_response.get("response") if isinstance(json_response, dict) else json_response
-        except requests.exceptions.RequestException as e:
-            logger.error(f"API PUT error: {endpoint} - {str(e)}")
-            if hasattr(e, 'response') and e.response:
-                logger.error(f"Response: {e.response.status_code} - {e.response.text}")
-            return None
-        except Exception as e:
-            logger.error(f"Unexpected error in PUT {endpoint}: {str(e)}")
+    @staticmethod
+    async def _fetch_cached(key, ttl, endpoint, params, decode, priority):
+        """Fetch a cacheable GET, revalidating the cached entry if there is one"""
+        generation = _cache.generation
+        entry = await RemnaAPI._request(
+            "GET", endpoint, params=params, decode=decode, priority=priority,
+            conditional=True, previous=_cache.entry(key)
+        )
+        if entry is None or entry.value is None:
             return None
-    
+        _cache.set(key, entry, ttl, generation)
+        return entry.value
+
     @staticmethod
-    async def delete(endpoint, params=None):
-        """Make a DELETE request to the API"""
+    async def get(endpoint, params=None, bypass_cache=False, decode=None, priority=INTERACTIVE):
+        """Make a GET request to the API
+
+        ``decode`` converts the unwrapped response once per fetch, before it
+        is shared with coalesced callers and stored in the cache.
+        ``priority`` is INTERACTIVE for handler requests or BACKGROUND for
+        work no admin is waiting for. Cacheable endpoints are revalidated
+        with a conditional request once expired or when ``bypass_cache``
+        is set, so an unchanged response returns the same object as before.
+        """
+        key = _request_key(endpoint, params)
+        ttl = API_CACHE_TTL.get(endpoint) if API_CACHE_ENABLED else None
+        if ttl and not bypass_cache:
+            cached = _cache.get(key)
+            if cached is not None:
+                return cached
+
+        # Concurrent identical requests share a single in-flight request of
+        # their lane; an admin never waits behind a queued background request,
+        # while background work may join an interactive one
+        lane_key = (key, priority)
+        task = _inflight.get(lane_key)
+        if task is None and priority == BACKGROUND:
+            task = _inflight.get((key, INTERACTIVE))
+        if task is not None:
+            API_COALESCED.inc(result="hit")
+        else:
+            API_COALESCED.inc(result="miss")
+            if ttl:
+                request = RemnaAPI._fetch_cached(key, ttl, endpoint, params, decode, priority)
+            else:
+                request = RemnaAPI._request("GET", endpoint, params=params, decode=decode, priority=priority)
+            task = asyncio.ensure_future(request)
+            _inflight[lane_key] = task
+            task.add_done_callback(lambda _: _inflight.pop(lane_key, None))
+        # Shield the shared request so one cancelled caller doesn't cancel it for the others
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def stream_items(endpoint, path=("response",), params=None, priority=INTERACTIVE):
+        """Yield the items of a JSON array in a GET response while it downloads
+
+        Responses are not cached, so this is meant for arrays too large to
+        hold at once. Raises StreamError when the request fails or the
+        array is cut off, items already yielded are then incomplete.
+        """
+        decoder = JSONArrayStream(path)
+        if not _breaker.allow():
+            logger.warning(f"API GET skipped: {endpoint} - panel unavailable, next attempt in {_breaker.retry_in():.0f}s")
+            raise StreamError(f"panel unavailable, next attempt in {_breaker.retry_in():.0f}s")
+        outcome = None
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.delete(
-                    f"{API_BASE_URL}/{endpoint}",
-                    headers=get_headers(),
-                    params=params,
-                )
-            response.raise_for_status()
-            json_response = response.json()
-            return json_response.get("response") if isinstance(json_response, dict) else json_response
+            async with _scheduler.slot(endpoint, priority):
+                started = time.perf_counter()
+                span_start = time.time_ns()
+                response = error = None
+                try:
+                    async with get_client().stream("GET", endpoint, params=params) as response:
+                        outcome = response.status_code < 500
+                        if response.is_error:
+                            await response.aread()
+                        response.raise_for_status()
+                        # Read to the end even after the array, httpx's text and byte iterators
+                        # left early keep the response alive until they are collected
+                        async for chunk in response.aiter_text():
+                            for item in decoder.feed(chunk):
+                                yield item
+                except httpx.RequestError as e:
+                    error = e
+                    raise
+                finally:
+                    _observe(
+                        "GET", endpoint, started, response=None if error else response, error=error,
+                        size=response.num_bytes_downloaded if response is not None else None
+                    )
+                    # Streams are not made the current span, the caller runs between chunks
+                    record_span(
+                        f"api GET {endpoint_template(endpoint)} (stream)", span_start, time.time_ns(),
+                        status=response.status_code if response is not None else None
+                    )
+            if not decoder.done:
+                raise StreamError("response ended before the end of the array")
         except httpx.HTTPStatusError as e:
-            logger.error(f"API DELETE error: {endpoint} - {str(e)}")
+            logger.error(f"API GET error: {endpoint} - {str(e)}")
             if e.response is not None:
                 logger.error(f"Response: {e.response.status_code} - {e.response.text}")
-            return None
+            raise StreamError(str(e)) from e
         except httpx.RequestError as e:
-            logger.error(f"API DELETE request error: {endpoint} - {str(e)}")
-            return None
+            if isinstance(e, RETRY_EXCEPTIONS):
+                outcome = False
+            logger.error(f"API GET request error: {endpoint} - {str(e)}")
+            raise StreamError(str(e)) from e
+        except StreamError as e:
+            logger.error(f"API GET incomplete: {endpoint} - {str(e)}")
+            raise
         except Exception as e:
-            logger.error(f"Unexpected error in DELETE {endpoint}: {str(e)}")
-            return None
+            logger.error(f"Unexpected error in GET {endpoint}: {str(e)}")
+            raise StreamError(str(e)) from e
+        finally:
+            if outcome is True:
+                _breaker.record_success()
+            elif outcome is False:
+                _breaker.record_failure()
+            else:
+                _breaker.release()
+
+    @staticmethod
+    async def post(endpoint, data=None, priority=INTERACTIVE):
+        """Make a POST request to the API"""
+        return await RemnaAPI._write("POST", endpoint, data=data, priority=priority)
 
     @staticmethod
-    async def put(endpoint, data=None):
+    async def patch(endpoint, data=None, priority=INTERACTIVE):
+        """Make a PATCH request to the API"""
+        return await RemnaAPI._write("PATCH", endpoint, data=data, priority=priority)
+
+    @staticmethod
+    async def put(endpoint, data=None, priority=INTERACTIVE):
         """Make a PUT request to the API"""
-        try:
-            logger.debug(f"PUT request to {endpoint} with data: {json.dumps(data, indent=2)}")
-            async with httpx.AsyncClient() as client:
-                response = await client.put(
-                    f"{API_BASE_URL}/{endpoint}",
-                    headers=get_headers(),
-                    json=data,
-                )
-            response.raise_for_status()
-            json_response = response.json()
-            return json_response.get("response") if isinstance(json_response, dict) else json_response
-        except httpx.HTTPStatusError as e:
-            logger.error(f"API PUT error: {endpoint} - {str(e)}")
-            if e.response is not None:
-                logger.error(f"Response: {e.response.status_code} - {e.response.text}")
-            return None
-        except httpx.RequestError as e:
-            logger.error(f"API PUT request error: {endpoint} - {str(e)}")
-            return None
-        except Exception as e:
-            logger.error(f"Unexpected error in PUT {endpoint}: {str(e)}")
-            return None
+        return await RemnaAPI._write("PUT", endpoint, data=data, priority=priority)
+
+    @staticmethod
+    async def delete(endpoint, params=None, priority=INTERACTIVE):
+        """Make a DELETE request to the API"""
+        return await RemnaAPI._write("DELETE", endpoint, params=params, priority=priority)
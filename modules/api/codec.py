@@ -0,0 +1,72 @@
+import json
+import logging
+from modules.config import API_JSON_CODEC
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+def _select_codec():
+    """Pick the fastest available JSON codec, honouring API_JSON_CODEC"""
+    available = {
+        "orjson": orjson is not None,
+        "msgspec": msgspec is not None,
+        "json": True,
+    }
+    if API_JSON_CODEC != "auto":
+        if available.get(API_JSON_CODEC):
+            return API_JSON_CODEC
+        logger.warning(f"JSON codec '{API_JSON_CODEC}' is not available, selecting automatically")
+    return next(name for name in ("orjson", "msgspec", "json") if available[name])
+
+CODEC = _select_codec()
+
+if CODEC == "orjson":
+    def dumps(obj):
+        """Encode an object to JSON bytes"""
+        return orjson.dumps(obj)
+
+    def dumps_pretty(obj):
+        """Encode an object to indented JSON text for logs"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+    def loads(data):
+        """Decode JSON bytes or text"""
+        return orjson.loads(data)
+
+elif CODEC == "msgspec":
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def dumps(obj):
+        """Encode an object to JSON bytes"""
+        return _encoder.encode(obj)
+
+    def dumps_pretty(obj):
+        """Encode an object to indented JSON text for logs"""
+        return msgspec.json.format(_encoder.encode(obj), indent=2).decode()
+
+    def loads(data):
+        """Decode JSON bytes or text"""
+        return _decoder.decode(data)
+
+else:
+    def dumps(obj):
+        """Encode an object to JSON bytes"""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def dumps_pretty(obj):
+        """Encode an object to indented JSON text for logs"""
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+
+    def loads(data):
+        """Decode JSON bytes or text"""
+        return json.loads(data)
@@ -1,17 +1,18 @@
 from modules.api.client import RemnaAPI
+from modules.api.models import Host
 
 class HostAPI:
     """API methods for host management"""
     
     @staticmethod
-    async def get_all_hosts():
+    async def get_all_hosts(bypass_cache=False):
         """Get all hosts"""
-        return await RemnaAPI.get("hosts")
+        return await RemnaAPI.get("hosts", bypass_cache=bypass_cache, decode=Host.from_list)
     
     @staticmethod
     async def get_host_by_uuid(uuid):
         """Get host by UUID"""
-        return await RemnaAPI.get(f"hosts/{uuid}")
+        return await RemnaAPI.get(f"hosts/{uuid}", decode=Host.from_dict)
     
     @staticmethod
     async def create_host(data):
@@ -1,17 +1,18 @@
 from modules.api.client import RemnaAPI
+from modules.api.models import Inbound
 
 class InboundAPI:
     """API methods for inbound management"""
     
     @staticmethod
-    async def get_inbounds():
+    async def get_inbounds(bypass_cache=False):
         """Get all inbounds"""
-        return await RemnaAPI.get("inbounds")
+        return await RemnaAPI.get("inbounds", bypass_cache=bypass_cache, decode=Inbound.from_list)
     
     @staticmethod
-    async def get_full_inbounds():
+    async def get_full_inbounds(bypass_cache=False):
         """Get inbounds with full details"""
-        return await RemnaAPI.get("inbounds/full")
+        return await RemnaAPI.get("inbounds/full", bypass_cache=bypass_cache, decode=Inbound.from_list)
     
     @staticmethod
     async def add_inbound_to_users(inbound_uuid):
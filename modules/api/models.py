@@ -0,0 +1,96 @@
+class Model:
+    """Compact read-only view of a panel object
+
+    Only the fields listed in ``FIELDS`` are kept, in slots instead of a
+    per-instance dict. Fields can be read as attributes or with the
+    dict-style access used by the handlers and formatters, so models and
+    raw API dicts are interchangeable there.
+    """
+
+    __slots__ = ()
+    FIELDS = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a model from an API object"""
+        if data is None:
+            return None
+        obj = cls.__new__(cls)
+        for field in cls.FIELDS:
+            setattr(obj, field, data.get(field))
+        return obj
+
+    @classmethod
+    def from_list(cls, items):
+        """Build models from a list of API objects"""
+        if not isinstance(items, list):
+            return items
+        return [cls.from_dict(item) for item in items]
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.FIELDS and getattr(self, key) is not None
+
+    def get(self, key, default=None):
+        """Get a field value like dict.get"""
+        value = getattr(self, key, None) if key in self.FIELDS else None
+        return default if value is None else value
+
+    def to_dict(self):
+        """Convert back to a plain dict"""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self):
+        return f"{type(self).__name__}(uuid={self.get('uuid')!r})"
+
+class User(Model):
+    """Panel user"""
+
+    FIELDS = (
+        "uuid", "shortUuid", "subscriptionUuid", "subscriptionUrl", "username", "status",
+        "usedTrafficBytes", "lifetimeUsedTrafficBytes", "trafficLimitBytes", "trafficLimitStrategy",
+        "expireAt", "description", "tag", "telegramId", "email", "hwidDeviceLimit",
+        "createdAt", "updatedAt"
+    )
+    __slots__ = FIELDS
+
+class Node(Model):
+    """Panel node"""
+
+    FIELDS = (
+        "uuid", "name", "address", "port", "countryCode", "consumptionMultiplier",
+        "isConnected", "isDisabled", "isNodeOnline", "isXrayRunning", "xrayVersion", "xrayUptime",
+        "usersOnline", "trafficLimitBytes", "trafficUsedBytes", "cpuCount", "cpuModel", "totalRam"
+    )
+    __slots__ = FIELDS
+
+class Host(Model):
+    """Panel host"""
+
+    FIELDS = (
+        "uuid", "remark", "address", "port", "inboundUuid", "path", "sni", "host",
+        "alpn", "fingerprint", "allowInsecure", "securityLayer", "isDisabled"
+    )
+    __slots__ = FIELDS
+
+class Inbound(Model):
+    """Panel inbound"""
+
+    FIELDS = ("uuid", "tag", "type", "port", "network", "security", "users", "nodes")
+    __slots__ = FIELDS
+
+class HwidDevice(Model):
+    """HWID device of a user"""
+
+    FIELDS = ("hwid", "userUuid", "platform", "osVersion", "deviceModel", "createdAt")
+    __slots__ = FIELDS
+
+def decode_users_page(page):
+    """Convert the users of a paginated user list to models"""
+    if not isinstance(page, dict):
+        return page
+    return {**page, "users": User.from_list(page.get("users") or [])}
@@ -1,17 +1,18 @@
 from modules.api.client import RemnaAPI
+from modules.api.models import Node
 
 class NodeAPI:
     """API methods for node management"""
     
     @staticmethod
-    async def get_all_nodes():
+    async def get_all_nodes(bypass_cache=False):
         """Get all nodes"""
-        return await RemnaAPI.get("nodes")
+        return await RemnaAPI.get("nodes", bypass_cache=bypass_cache, decode=Node.from_list)
     
     @staticmethod
     async def get_node_by_uuid(uuid):
         """Get node by UUID"""
-        return await RemnaAPI.get(f"nodes/{uuid}")
+        return await RemnaAPI.get(f"nodes/{uuid}", decode=Node.from_dict)
     
     @staticmethod
     async def create_node(data):
@@ -63,6 +64,16 @@ class NodeAPI:
         }
         return await RemnaAPI.get(f"nodes/usage/{uuid}/users/range", params)
     
+    @staticmethod
+    async def iter_node_usage_by_range(uuid, start_date, end_date):
+        """Stream per-user usage entries of a node by date range"""
+        params = {
+            "start": start_date,
+            "end": end_date
+        }
+        async for entry in RemnaAPI.stream_items(f"nodes/usage/{uuid}/users/range", params=params):
+            yield entry
+    
     @staticmethod
     async def get_nodes_realtime_usage():
         """Get nodes realtime usage"""
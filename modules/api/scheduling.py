@@ -0,0 +1,195 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+# Request priorities, in the order they are served
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BACKGROUND)
+
+# Endpoint groups by the first segment of the API path
+ENDPOINT_GROUPS = {
+    "users": "users",
+    "hwid": "users",
+    "nodes": "nodes",
+    "hosts": "hosts",
+    "system": "stats",
+}
+
+def endpoint_group(endpoint):
+    """Get the limit group of an API endpoint"""
+    return ENDPOINT_GROUPS.get(endpoint.split("/", 1)[0], "default")
+
+class TokenBucket:
+    """Request rate limit, waiting callers are served in priority and arrival order"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.throttled = 0
+        # Only one caller waits for the next token at a time
+        self._turn = Gate(1)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, lane=INTERACTIVE):
+        """Take a token, waiting until one is available"""
+        if self.rate <= 0:
+            return
+        await self._turn.acquire(lane)
+        try:
+            self._refill()
+            if self.tokens < 1:
+                self.throttled += 1
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+        finally:
+            self._turn.release(lane)
+
+class Gate:
+    """Concurrency limit with an interactive and a background lane
+
+    Waiting interactive callers are always served before background ones,
+    and background callers never take the slots reserved for interactive
+    requests. Within a lane callers are served in arrival order.
+    """
+
+    def __init__(self, limit, reserve=0):
+        self.limit = limit
+        self.background_limit = max(1, limit - reserve)
+        self.active = {INTERACTIVE: 0, BACKGROUND: 0}
+        self._waiters = {INTERACTIVE: deque(), BACKGROUND: deque()}
+
+    def queued(self, lane):
+        return len(self._waiters[lane])
+
+    def _can_start(self, lane):
+        if sum(self.active.values()) >= self.limit:
+            return False
+        if lane == BACKGROUND:
+            return self.active[BACKGROUND] < self.background_limit
+        return True
+
+    async def acquire(self, lane=INTERACTIVE):
+        """Take a slot, waiting until one is free"""
+        if self.limit <= 0:
+            return
+        waiting = self._waiters[INTERACTIVE] or (lane == BACKGROUND and self._waiters[BACKGROUND])
+        if not waiting and self._can_start(lane):
+            self.active[lane] += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over right before the cancellation
+                self.release(lane)
+            else:
+                try:
+                    self._waiters[lane].remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self, lane=INTERACTIVE):
+        """Free a slot, handing it straight to the next waiter"""
+        if self.limit <= 0:
+            return
+        self.active[lane] -= 1
+        for next_lane in LANES:
+            waiters = self._waiters[next_lane]
+            while waiters and self._can_start(next_lane):
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    self.active[next_lane] += 1
+                    waiter.set_result(None)
+            if waiters:
+                # Background callers never overtake waiting interactive ones
+                return
+
+class RequestScheduler:
+    """Rate and concurrency limits for panel requests, global and per endpoint group
+
+    A request takes a slot in its group and a global slot, then a token
+    from both rate limits. Each group can use only part of the global
+    capacity, so a backlog in one group never blocks the others.
+    Background requests are served only when no interactive request is
+    waiting and never use the global slots reserved for interactive ones.
+    """
+
+    def __init__(self, rate, burst, concurrency, group_limits, interactive_reserve=0):
+        self.bucket = TokenBucket(rate, burst)
+        self.gate = Gate(concurrency, interactive_reserve)
+        self.groups = {
+            name: (
+                TokenBucket(group_rate, group_burst),
+                Gate(group_concurrency, min(interactive_reserve, group_concurrency - 1)),
+            )
+            for name, (group_rate, group_burst, group_concurrency) in group_limits.items()
+        }
+        self.groups.setdefault("default", (TokenBucket(0, 1), Gate(0)))
+        self.lanes = {lane: {"requests": 0, "wait_total": 0.0, "wait_max": 0.0} for lane in LANES}
+
+    @asynccontextmanager
+    async def slot(self, endpoint, lane=INTERACTIVE):
+        """Hold the capacity for one request to the endpoint"""
+        bucket, gate = self.groups.get(endpoint_group(endpoint), self.groups["default"])
+        started = time.monotonic()
+        await gate.acquire(lane)
+        try:
+            await self.gate.acquire(lane)
+            try:
+                await bucket.acquire(lane)
+                await self.bucket.acquire(lane)
+                self._record_wait(lane, time.monotonic() - started)
+                yield
+            finally:
+                self.gate.release(lane)
+        finally:
+            gate.release(lane)
+
+    def _record_wait(self, lane, waited):
+        stats = self.lanes[lane]
+        stats["requests"] += 1
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+
+    def lane_stats(self):
+        """Get queue depth and wait times per priority lane"""
+        gates = [self.gate] + [gate for _, gate in self.groups.values()]
+        return {
+            lane: {
+                "queued": sum(gate.queued(lane) for gate in gates),
+                "requests": stats["requests"],
+                "wait_avg": stats["wait_total"] / stats["requests"] if stats["requests"] else 0.0,
+                "wait_max": stats["wait_max"],
+            }
+            for lane, stats in self.lanes.items()
+        }
+
+    def stats(self):
+        """Get active and queued requests per group"""
+        stats = {
+            name: {
+                "active": sum(gate.active.values()),
+                "queued": sum(gate.queued(lane) for lane in LANES),
+                "throttled": bucket.throttled,
+            }
+            for name, (bucket, gate) in self.groups.items()
+        }
+        stats["global"] = {
+            "active": sum(self.gate.active.values()),
+            "queued": sum(self.gate.queued(lane) for lane in LANES),
+            "throttled": self.bucket.throttled,
+        }
+        return stats
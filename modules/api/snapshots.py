@@ -0,0 +1,137 @@
+import time
+from modules.api.users import UserAPI
+from modules.api.client import on_invalidate
+from modules.api.scheduling import INTERACTIVE, BACKGROUND
+from modules.utils.metrics import REGISTRY
+
+# Seconds a new user list keeps joining the latest snapshot instead of fetching its own
+SNAPSHOT_SHARE_WINDOW = 60
+# Fetches of the first page when users keep being changed while it loads
+OPEN_ATTEMPTS = 3
+
+class Snapshot:
+    """Frozen view of one version of the user list, filled one page at a time
+
+    Pages are fetched on first use, but only while the user list is still
+    at the version the snapshot was taken at, so a snapshot never mixes
+    two versions of the list. Pages and the total never change once set.
+    """
+
+    __slots__ = ("id", "version", "fetched_at", "page_size", "total", "pages", "refs")
+
+    def __init__(self, snapshot_id, version, page_size, total, first_page):
+        self.id = snapshot_id
+        self.version = version
+        self.fetched_at = time.time()
+        self.page_size = page_size
+        self.total = total
+        # Page index to a tuple of users
+        self.pages = {0: tuple(first_page)}
+        self.refs = 0
+
+    def page_count(self):
+        return max(1, (self.total + self.page_size - 1) // self.page_size)
+
+class SnapshotStore:
+    """User list snapshots shared by the sessions browsing the list
+
+    A session keeps only the ID of its snapshot and its page. Lists opened
+    within a short window share the latest snapshot, and a snapshot is
+    dropped as soon as no session refers to it, never before. A write to
+    the users endpoints starts a new version of the list: later lists get
+    a new snapshot, existing ones keep the pages they have and can no
+    longer fetch others.
+    """
+
+    def __init__(self):
+        self.snapshots = {}
+        self._last_id = 0
+        self._latest = None
+        # Bumped whenever users are changed through the bot
+        self.version = 0
+        REGISTRY.gauge("bot_user_snapshots", "User list snapshots in memory", function=lambda: len(self.snapshots))
+        REGISTRY.gauge(
+            "bot_user_snapshot_users", "Users held by the user list snapshots",
+            function=lambda: sum(len(page) for snapshot in self.snapshots.values() for page in snapshot.pages.values())
+        )
+
+    async def open(self, page_size):
+        """Take a reference to a snapshot of the user list, None if the list cannot be fetched"""
+        latest = self._latest
+        if (latest is None or latest.page_size != page_size
+                or time.time() - latest.fetched_at > SNAPSHOT_SHARE_WINDOW):
+            for _ in range(OPEN_ATTEMPTS):
+                version = self.version
+                page = await UserAPI.get_users_page(0, page_size)
+                if not page or not page.get("users"):
+                    return None
+                # A page fetched while users were changed may belong to either version
+                if version == self.version:
+                    break
+            else:
+                return None
+            latest = Snapshot(
+                self._next_id(), version, page_size, page.get("total", len(page["users"])), page["users"]
+            )
+            self.snapshots[latest.id] = latest
+            self._latest = latest
+        latest.refs += 1
+        return latest
+
+    def _next_id(self):
+        # Fetch time in nanoseconds, so IDs kept in persisted sessions never match a snapshot after a restart
+        self._last_id = max(self._last_id + 1, time.time_ns())
+        return self._last_id
+
+    def get(self, snapshot_id):
+        return self.snapshots.get(snapshot_id)
+
+    def outdated(self, snapshot):
+        """Check whether users were changed since the snapshot was taken"""
+        return snapshot.version != self.version
+
+    async def _fetch(self, snapshot, index, priority):
+        """Fetch a page of a snapshot unless the list moved on to another version"""
+        if self.outdated(snapshot):
+            return None
+        page = await UserAPI.get_users_page(index * snapshot.page_size, snapshot.page_size, priority=priority)
+        if not page or page.get("users") is None or self.outdated(snapshot):
+            return None
+        return snapshot.pages.setdefault(index, tuple(page["users"]))
+
+    async def page(self, snapshot, index):
+        """Get a page of a snapshot, fetching it on first use
+
+        None on a panel error, or if the page was not fetched before users
+        were changed; a new snapshot has to be opened then.
+        """
+        users = snapshot.pages.get(index)
+        if users is None:
+            users = await self._fetch(snapshot, index, INTERACTIVE)
+        return users
+
+    async def prefetch(self, snapshot, index):
+        """Fetch a page of a snapshot in the background before it is shown"""
+        if index not in snapshot.pages and index < snapshot.page_count():
+            await self._fetch(snapshot, index, BACKGROUND)
+
+    def invalidate(self, prefixes):
+        """Start a new version of the user list after users were changed"""
+        if "users" not in prefixes:
+            return
+        self.version += 1
+        self._latest = None
+
+    def release(self, snapshot_id):
+        """Drop a session's reference, and the snapshot with the last one"""
+        snapshot = self.snapshots.get(snapshot_id)
+        if snapshot is None:
+            return
+        snapshot.refs -= 1
+        if snapshot.refs <= 0:
+            self.snapshots.pop(snapshot.id, None)
+            if self._latest is snapshot:
+                self._latest = None
+
+user_snapshots = SnapshotStore()
+on_invalidate(user_snapshots.invalidate)
@@ -0,0 +1,128 @@
+import json
+import re
+
+# Whitespace, and the commas between the items of an array or the members of an object
+_SKIPPED = re.compile(r"[ \t\r\n,]*")
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+
+class JSONArrayStream:
+    """Incrementally extract the items of one array from a JSON document
+
+    The array is located by the chain of object keys leading to it, e.g.
+    ``("response", "users")`` for ``{"response": {"users": [...]}}``.
+    Text is fed in chunks as it arrives and every item is decoded as soon
+    as it is complete, so only the item being read is buffered. Values are
+    decoded with the C scanner of the json module, the Python code only
+    steps from one value to the next.
+    """
+
+    def __init__(self, path):
+        self.path = list(path)
+        self.done = False
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        # Keys of the path matched so far, and what is expected next
+        self._level = 0
+        self._state = "value"
+        self._key = None
+        self._missing = False
+
+    def feed(self, text):
+        """Feed a chunk of text and return the items completed by it"""
+        items = []
+        if self.done or self._missing:
+            return items
+        self._buffer += text
+        while self._step(items):
+            pass
+
+        # Drop text that has already been consumed
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        return items
+
+    def _skip(self, pattern):
+        """Move past whitespace, return the next character or None at the end of the buffer"""
+        self._pos = pattern.match(self._buffer, self._pos).end()
+        return self._buffer[self._pos] if self._pos < len(self._buffer) else None
+
+    def _decode(self):
+        """Decode the value at the current position, None while it is incomplete
+
+        A value must be followed by the delimiter after it, so a number cut
+        off at the end of a chunk is not taken for a complete one.
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except ValueError:
+            return None
+        after = _WHITESPACE.match(self._buffer, end).end()
+        if after >= len(self._buffer) or self._buffer[after] not in ",]}:":
+            return None
+        self._pos = end
+        return (value,)
+
+    def _step(self, items):
+        """Consume the next token, return False when more text is needed"""
+        if self._state == "items":
+            c = self._skip(_SKIPPED)
+            if c is None:
+                return False
+            if c == "]":
+                self.done = True
+                self._pos += 1
+                return False
+            decoded = self._decode()
+            if decoded is None:
+                return False
+            items.append(decoded[0])
+            return True
+
+        if self._state == "key":
+            c = self._skip(_SKIPPED)
+            if c is None:
+                return False
+            if c != '"':
+                # The object ended without the wanted key
+                self._missing = True
+                return False
+            decoded = self._decode()
+            if decoded is None:
+                return False
+            self._key = decoded[0]
+            self._state = "colon"
+            return True
+
+        if self._state == "colon":
+            c = self._skip(_WHITESPACE)
+            if c is None:
+                return False
+            self._pos += 1
+            self._state = "value"
+            return True
+
+        # A value: the document itself or the value of the last key read
+        c = self._skip(_WHITESPACE)
+        if c is None:
+            return False
+        wanted = self._level == 0 or self._key == self.path[self._level - 1]
+        if not wanted:
+            if self._decode() is None:
+                return False
+            self._state = "key"
+            return True
+        if self._level == len(self.path):
+            if c != "[":
+                self._missing = True
+                return False
+            self._state = "items"
+        else:
+            if c != "{":
+                self._missing = True
+                return False
+            self._level += 1
+            self._state = "key"
+        self._pos += 1
+        return True
@@ -4,14 +4,14 @@ class SystemAPI:
     """API methods for system management"""
     
     @staticmethod
-    async def get_stats():
+    async def get_stats(bypass_cache=False):
         """Get system statistics"""
-        return await RemnaAPI.get("system/stats")
+        return await RemnaAPI.get("system/stats", bypass_cache=bypass_cache)
     
     @staticmethod
-    async def get_bandwidth_stats():
+    async def get_bandwidth_stats(bypass_cache=False):
         """Get bandwidth statistics"""
-        return await RemnaAPI.get("system/stats/bandwidth")
+        return await RemnaAPI.get("system/stats/bandwidth", bypass_cache=bypass_cache)
     
     @staticmethod
     async def get_nodes_statistics():
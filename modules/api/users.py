@@ -1,5 +1,6 @@
 import logging
-from modules.api.client import RemnaAPI
+from modules.api.client import RemnaAPI, INTERACTIVE
+from modules.api.models import User, HwidDevice, decode_users_page
 import re
 
 logger = logging.getLogger(__name__)
@@ -8,46 +9,68 @@ class UserAPI:
     """API client for user operations"""
     
     @staticmethod
-    async def get_all_users():
-        """Get all users"""
-        return await RemnaAPI.get("users")
+    async def get_users_page(start=0, size=25, priority=INTERACTIVE):
+        """Get a page of users"""
+        return await RemnaAPI.get(
+            "users", {"start": start, "size": size}, decode=decode_users_page, priority=priority
+        )
+    
+    @staticmethod
+    async def iter_users(page_size=500, priority=INTERACTIVE):
+        """Iterate over all users, streaming one page at a time
+
+        Pages are decoded while they download and are not cached, so walking
+        a large user list holds one page at most. Raises StreamError if a
+        page cannot be fetched completely.
+        """
+        start = 0
+        while True:
+            count = 0
+            params = {"start": start, "size": page_size}
+            async for user in RemnaAPI.stream_items("users", ("response", "users"), params, priority):
+                count += 1
+                yield User.from_dict(user)
+            # A short page is the last one
+            if count < page_size:
+                return
+            start += count
     
     @staticmethod
     async def get_user_by_uuid(uuid):
         """Get user by UUID"""
-        return await RemnaAPI.get(f"users/{uuid}")
+        return await RemnaAPI.get(f"users/{uuid}", decode=User.from_dict)
     
     @staticmethod
     async def get_user_by_short_uuid(short_uuid):
         """Get user by short UUID"""
-        return await RemnaAPI.get(f"users/by-short-uuid/{short_uuid}")
+        return await RemnaAPI.get(f"users/by-short-uuid/{short_uuid}", decode=User.from_dict)
     
     @staticmethod
     async def get_user_by_subscription_uuid(subscription_uuid):
         """Get user by subscription UUID"""
-        return await RemnaAPI.get(f"users/by-subscription-uuid/{subscription_uuid}")
+        return await RemnaAPI.get(f"users/by-subscription-uuid/{subscription_uuid}", decode=User.from_dict)
     
     @staticmethod
     async def get_user_by_username(username):
         """Get user by username"""
-        return await RemnaAPI.get(f"users/by-username/{username}")
+        return await RemnaAPI.get(f"users/by-username/{username}", decode=User.from_dict)
     
     @staticmethod
     async def get_user_by_telegram_id(telegram_id):
         """Get user by Telegram ID"""
-        result = await RemnaAPI.get(f"users/by-telegram-id/{telegram_id}")
+        result = await RemnaAPI.get(f"users/by-telegram-id/{telegram_id}", decode=User.from_list)
         return result if result else []
     
     @staticmethod
     async def get_user_by_email(email):
         """Get user by email"""
-        result = await RemnaAPI.get(f"users/by-email/{email}")
+        result = await RemnaAPI.get(f"users/by-email/{email}", decode=User.from_list)
         return result if result else []
     
     @staticmethod
     async def get_user_by_tag(tag):
         """Get user by tag"""
-        result = await RemnaAPI.get(f"users/by-tag/{tag}")
+        result = await RemnaAPI.get(f"users/by-tag/{tag}", decode=User.from_list)
         return result if result else []
     
     @staticmethod
@@ -149,7 +172,7 @@ class UserAPI:
     @staticmethod
     async def get_user_hwid_devices(uuid):
         """Get user HWID devices"""
-        return await RemnaAPI.get(f"hwid/devices/{uuid}")
+        return await RemnaAPI.get(f"hwid/devices/{uuid}", decode=HwidDevice.from_list)
     
     @staticmethod
     async def add_user_hwid_device(uuid, hwid, platform=None, os_version=None, device_model=None, user_agent=None):
@@ -10,6 +10,113 @@ API_TOKEN = os.getenv("REMNAWAVE_API_TOKEN")
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 ADMIN_USER_IDS = [int(id) for id in os.getenv("ADMIN_USER_IDS", "").split(",") if id]
 
+# API connection pool
+API_MAX_CONNECTIONS = int(os.getenv("API_MAX_CONNECTIONS", "20"))
+API_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("API_MAX_KEEPALIVE_CONNECTIONS", "10"))
+API_KEEPALIVE_EXPIRY = float(os.getenv("API_KEEPALIVE_EXPIRY", "30"))
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "10"))
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "5"))
+# Multiplex panel requests over a single HTTP/2 connection (requires the h2 package)
+API_HTTP2 = os.getenv("API_HTTP2", "false").lower() == "true"
+# JSON codec for panel payloads: auto, orjson, msgspec or json
+API_JSON_CODEC = os.getenv("API_JSON_CODEC", "auto").lower()
+
+# Retries of transient panel failures (502/503/504/429, timeouts, connection errors)
+# Attempts per request including the first one, 1 disables retries
+API_RETRY_ATTEMPTS = max(1, int(os.getenv("API_RETRY_ATTEMPTS", "3")))
+API_RETRY_BACKOFF_BASE = float(os.getenv("API_RETRY_BACKOFF_BASE", "0.5"))
+API_RETRY_BACKOFF_MAX = float(os.getenv("API_RETRY_BACKOFF_MAX", "10"))
+
+# Circuit breaker: fail fast after this many consecutive failures, 0 disables it
+API_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("API_CIRCUIT_FAILURE_THRESHOLD", "5"))
+# Seconds to wait before probing the panel again
+API_CIRCUIT_RESET_TIMEOUT = float(os.getenv("API_CIRCUIT_RESET_TIMEOUT", "30"))
+# Probe requests let through at once while half-open
+API_CIRCUIT_HALF_OPEN_PROBES = max(1, int(os.getenv("API_CIRCUIT_HALF_OPEN_PROBES", "1")))
+
+# Client-side limits for panel requests, 0 disables a limit
+API_RATE_LIMIT = float(os.getenv("API_RATE_LIMIT", "20"))  # requests per second
+API_RATE_BURST = int(os.getenv("API_RATE_BURST", "40"))
+API_CONCURRENCY = int(os.getenv("API_CONCURRENCY", "16"))
+# Slots background requests (prefetching, reports) leave free for admin clicks
+API_INTERACTIVE_RESERVE = int(os.getenv("API_INTERACTIVE_RESERVE", "4"))
+# Per endpoint group: (requests per second, burst, concurrent requests),
+# overridden with API_GROUP_LIMIT_<GROUP>=rate,burst,concurrency
+def _group_limits(group, default):
+    value = os.getenv(f"API_GROUP_LIMIT_{group.upper()}", default)
+    rate, burst, concurrency = (part.strip() for part in value.split(","))
+    return (float(rate), int(burst), int(concurrency))
+
+API_GROUP_LIMITS = {
+    'users': _group_limits('users', "10,20,8"),
+    'nodes': _group_limits('nodes', "5,10,4"),
+    'hosts': _group_limits('hosts', "5,10,4"),
+    'stats': _group_limits('stats', "5,10,4"),
+    'default': _group_limits('default', "5,10,4")
+}
+
+# API response cache
+API_CACHE_ENABLED = os.getenv("API_CACHE_ENABLED", "true").lower() == "true"
+API_CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "256"))
+# Time to live in seconds for cached GET endpoints
+API_CACHE_TTL = {
+    'users': 15,
+    'inbounds': 60,
+    'inbounds/full': 60,
+    'hosts': 30,
+    'nodes': 15,
+    'system/stats': 10
+}
+
+# Prometheus metrics endpoint, port 0 disables it
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# Event loop monitor: slow callback detection and periodic lag summary in the log
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "false").lower() == "true"
+LOOP_SLOW_CALLBACK_MS = float(os.getenv("LOOP_SLOW_CALLBACK_MS", "100"))
+LOOP_MONITOR_REPORT_INTERVAL = float(os.getenv("LOOP_MONITOR_REPORT_INTERVAL", "300"))
+
+# Per-update tracing written to a local file as JSON lines: jsonl or otlp (OTLP/JSON)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")
+TRACE_EXPORT_FORMAT = os.getenv("TRACE_EXPORT_FORMAT", "jsonl").lower()
+
+# Updates handled at once, updates of the same chat are always handled in order
+UPDATE_CONCURRENCY = max(1, int(os.getenv("UPDATE_CONCURRENCY", "8")))
+
+# Outbound Telegram limits for messages and edits, 0 disables a limit
+TELEGRAM_RATE_LIMIT = float(os.getenv("TELEGRAM_RATE_LIMIT", "25"))  # calls per second
+TELEGRAM_CHAT_RATE_LIMIT = float(os.getenv("TELEGRAM_CHAT_RATE_LIMIT", "1"))  # messages per second to a group or channel
+TELEGRAM_CHAT_BURST = int(os.getenv("TELEGRAM_CHAT_BURST", "5"))
+# Flood control (429) retries, waits longer than TELEGRAM_FLOOD_MAX_WAIT seconds are not retried
+TELEGRAM_FLOOD_RETRIES = int(os.getenv("TELEGRAM_FLOOD_RETRIES", "3"))
+TELEGRAM_FLOOD_MAX_WAIT = float(os.getenv("TELEGRAM_FLOOD_MAX_WAIT", "60"))
+
+# Conversation state and user_data kept in SQLite across restarts
+PERSISTENCE_ENABLED = os.getenv("PERSISTENCE_ENABLED", "false").lower() == "true"
+PERSISTENCE_PATH = os.getenv("PERSISTENCE_PATH", "persistence.sqlite3")
+# Seconds between writes of the changed rows
+PERSISTENCE_UPDATE_INTERVAL = float(os.getenv("PERSISTENCE_UPDATE_INTERVAL", "5"))
+
+# Seconds of inactivity after which a conversation ends and its session state is dropped, 0 disables it
+SESSION_TIMEOUT = float(os.getenv("SESSION_TIMEOUT", "1800"))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+# Approximate bytes of user_data per admin before cached data is dropped, 0 disables the limit
+SESSION_MEMORY_BUDGET = int(os.getenv("SESSION_MEMORY_BUDGET", "262144"))
+
+# How updates are received: polling or webhook
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+# Webhook listener, WEBHOOK_URL is the public address Telegram posts updates to
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram").strip("/")
+WEBHOOK_SECRET_TOKEN = os.getenv("WEBHOOK_SECRET_TOKEN", "")
+# Certificate and key to terminate TLS in the bot, leave empty behind a reverse proxy
+WEBHOOK_CERT = os.getenv("WEBHOOK_CERT", "")
+WEBHOOK_KEY = os.getenv("WEBHOOK_KEY", "")
+
 # Conversation states
 MAIN_MENU, USER_MENU, NODE_MENU, STATS_MENU, HOST_MENU, INBOUND_MENU = range(6)
 SELECTING_USER, WAITING_FOR_INPUT, CONFIRM_ACTION = range(6, 9)
@@ -1,13 +1,13 @@
 from telegram.ext import (
-    CommandHandler, CallbackQueryHandler, MessageHandler, filters,
-    ConversationHandler
+    CommandHandler, CallbackQueryHandler, MessageHandler, filters
 )
 
 from modules.config import (
     MAIN_MENU, USER_MENU, NODE_MENU, STATS_MENU, HOST_MENU, INBOUND_MENU, BULK_MENU,
     SELECTING_USER, WAITING_FOR_INPUT, CONFIRM_ACTION,
     EDIT_USER, EDIT_FIELD, EDIT_VALUE,
-    CREATE_USER, CREATE_USER_FIELD, BULK_CONFIRM
+    CREATE_USER, CREATE_USER_FIELD, BULK_CONFIRM,
+    PERSISTENCE_ENABLED, SESSION_TIMEOUT
 )
 
 from modules.handlers.start_handler import start
@@ -23,10 +23,11 @@ from modules.handlers.stats_handlers import handle_stats_menu
 from modules.handlers.host_handlers import handle_hosts_menu
 from modules.handlers.inbound_handlers import handle_inbounds_menu
 from modules.handlers.bulk_handlers import handle_bulk_menu, handle_bulk_confirm
+from modules.utils.tracing import TracedConversationHandler
 
 def create_conversation_handler():
     """Create the main conversation handler"""
-    return ConversationHandler(
+    return TracedConversationHandler(
         entry_points=[CommandHandler("start", start)],
         states={
             MAIN_MENU: [
@@ -82,5 +83,6 @@ def create_conversation_handler():
         },
         fallbacks=[CommandHandler("start", start)],
         name="remnawave_admin_conversation",
-        persistent=False
+        persistent=PERSISTENCE_ENABLED,
+        conversation_timeout=SESSION_TIMEOUT or None
     )
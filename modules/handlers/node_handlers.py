@@ -4,7 +4,9 @@ from modules.utils.auth import check_admin
 
 from modules.config import MAIN_MENU, NODE_MENU
 from modules.api.nodes import NodeAPI
+from modules.api.client import StreamError
 from datetime import datetime, timedelta
+import heapq
 from modules.utils.formatters import format_node_details, format_bytes, escape_markdown
 from modules.handlers.start_handler import show_main_menu
 
@@ -310,7 +312,25 @@ async def show_node_stats(update: Update, context: ContextTypes.DEFAULT_TYPE, uu
     end_date = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.000Z")
     start_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
 
-    usage = await NodeAPI.get_node_usage_by_range(uuid, start_date, end_date)
+    # Keep only the top 10 users while the usage list streams in
+    top_usage = []
+    seen = 0
+    try:
+        async for entry in NodeAPI.iter_node_usage_by_range(uuid, start_date, end_date):
+            heapq.heappush(top_usage, (entry.get('total') or 0, seen, entry))
+            seen += 1
+            if len(top_usage) > 10:
+                heapq.heappop(top_usage)
+    except StreamError:
+        # A partial list would show wrong totals
+        keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data=f"view_node_{uuid}")]]
+        await update.callback_query.edit_message_text(
+            "❌ Ошибка при получении статистики.",
+            reply_markup=InlineKeyboardMarkup(keyboard),
+            parse_mode="Markdown",
+        )
+        return NODE_MENU
+    usage = [entry for _, _, entry in sorted(top_usage, key=lambda x: x[0], reverse=True)]
 
     if not node or not usage:
         keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data=f"view_node_{uuid}")]]
@@ -323,11 +343,9 @@ async def show_node_stats(update: Update, context: ContextTypes.DEFAULT_TYPE, uu
 
     message = f"📊 *Статистика сервера {escape_markdown(node['name'])} за 7 дней*\n\n"
 
-    sorted_usage = sorted(usage, key=lambda x: x.get('total', 0), reverse=True)
-
-    for i, user in enumerate(sorted_usage[:10]):
+    for i, user in enumerate(usage):
         username = user.get('username', 'unknown')
-        total = user.get('total', 0)
+        total = user.get('total') or 0
         message += f"{i+1}. {escape_markdown(username)} - {format_bytes(total)}\n"
 
     keyboard = [
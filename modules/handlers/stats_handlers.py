@@ -34,11 +34,11 @@ async def handle_stats_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     data = query.data
 
-    if data == "system_stats":
-        return await show_system_stats(update, context)
+    if data == "system_stats" or data == "refresh_system_stats":
+        return await show_system_stats(update, context, force_refresh=data == "refresh_system_stats")
 
-    elif data == "bandwidth_stats":
-        return await show_bandwidth_stats(update, context)
+    elif data == "bandwidth_stats" or data == "refresh_bandwidth_stats":
+        return await show_bandwidth_stats(update, context, force_refresh=data == "refresh_bandwidth_stats")
         
     elif data == "nodes_stats":
         return await show_nodes_stats(update, context)
@@ -53,11 +53,14 @@ async def handle_stats_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     return STATS_MENU
 
-async def show_system_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def show_system_stats(update: Update, context: ContextTypes.DEFAULT_TYPE, force_refresh=False):
     """Show system statistics"""
-    await update.callback_query.edit_message_text("📊 Загрузка статистики системы...")
+    # On refresh the message keeps the stats until the new ones are ready,
+    # so unchanged stats need no edit at all
+    if not force_refresh:
+        await update.callback_query.edit_message_text("📊 Загрузка статистики системы...")
 
-    stats = await SystemAPI.get_stats()
+    stats = await SystemAPI.get_stats(bypass_cache=force_refresh)
 
     if not stats:
         keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data="back_to_stats")]]
@@ -86,7 +89,7 @@ async def show_system_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Add back button
     keyboard = [
-        [InlineKeyboardButton("🔄 Обновить", callback_data="system_stats")],
+        [InlineKeyboardButton("🔄 Обновить", callback_data="refresh_system_stats")],
         [InlineKeyboardButton("🔙 Назад", callback_data="back_to_stats")]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -99,11 +102,12 @@ async def show_system_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     return STATS_MENU
 
-async def show_bandwidth_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def show_bandwidth_stats(update: Update, context: ContextTypes.DEFAULT_TYPE, force_refresh=False):
     """Show bandwidth statistics"""
-    await update.callback_query.edit_message_text("📈 Загрузка статистики трафика...")
+    if not force_refresh:
+        await update.callback_query.edit_message_text("📈 Загрузка статистики трафика...")
 
-    stats = await SystemAPI.get_bandwidth_stats()
+    stats = await SystemAPI.get_bandwidth_stats(bypass_cache=force_refresh)
 
     if not stats:
         keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data="back_to_stats")]]
@@ -119,7 +123,7 @@ async def show_bandwidth_stats(update: Update, context: ContextTypes.DEFAULT_TYP
 
     # Add back button
     keyboard = [
-        [InlineKeyboardButton("🔄 Обновить", callback_data="bandwidth_stats")],
+        [InlineKeyboardButton("🔄 Обновить", callback_data="refresh_bandwidth_stats")],
         [InlineKeyboardButton("🔙 Назад", callback_data="back_to_stats")]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -0,0 +1,177 @@
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes, CommandHandler
+from modules.utils.auth import check_admin
+
+from modules.api.client import (
+    get_breaker_stats, get_retry_stats, get_scheduler_stats, get_priority_stats,
+    get_coalescing_stats, get_cache_stats,
+    API_LATENCY, API_RESPONSE_SIZE, API_RESPONSES, API_ERRORS
+)
+from modules.utils.formatters import format_bytes
+from modules.utils.metrics import render_prometheus
+from modules.utils.sessions import top_sessions
+from modules.utils.profiler import (
+    sample_event_loop, profile_event_loop, ProfilerBusyError, MAX_DURATION
+)
+
+logger = logging.getLogger(__name__)
+
+# Endpoints shown in the /metrics summary
+METRICS_TOP_ENDPOINTS = 15
+
+DEFAULT_PROFILE_DURATION = 30
+
+# Sessions shown by /sessions
+TOP_SESSIONS = 10
+
+BREAKER_STATES = {
+    "closed": "🟢 Панель доступна",
+    "half-open": "🟡 Проверка доступности панели",
+    "open": "🔴 Панель недоступна",
+}
+
+@check_admin
+async def panel_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show the panel connection state"""
+    breaker = get_breaker_stats()
+    retries = get_retry_stats()
+
+    message = "🔌 *Состояние подключения к панели*\n\n"
+    message += f"{BREAKER_STATES.get(breaker['state'], breaker['state'])}\n"
+    if breaker["state"] == "open":
+        message += f"⏳ Следующая попытка через: {breaker['retry_in']:.0f} сек.\n"
+    message += f"❗ Ошибок подряд: {breaker['failures']}\n"
+    message += f"🚫 Отклонено запросов: {breaker['rejected']}\n"
+    message += f"⚡ Срабатываний: {breaker['trips']}\n"
+    message += f"🔁 Повторных запросов: {retries['retries']}\n"
+
+    message += "\n*Очереди запросов:*\n"
+    for group, stats in get_scheduler_stats().items():
+        message += f"• {group}: активно {stats['active']}, в очереди {stats['queued']}\n"
+
+    message += "\n*Приоритеты:*\n"
+    for lane, stats in get_priority_stats().items():
+        message += (
+            f"• {lane}: в очереди {stats['queued']}, "
+            f"ожидание {stats['wait_avg'] * 1000:.0f} мс (макс. {stats['wait_max'] * 1000:.0f} мс)\n"
+        )
+
+    coalescing = get_coalescing_stats()
+    message += "\n*Объединение запросов:*\n"
+    message += f"• Присоединено к выполняемым: {coalescing['hits']}, отправлено: {coalescing['misses']}\n"
+    message += f"• Выполняется сейчас: {coalescing['in_flight']}\n"
+
+    cache = get_cache_stats()
+    message += "\n*Кэш ответов:*\n"
+    message += f"• Попаданий: {cache['hits']}, промахов: {cache['misses']}, записей: {cache['size']}\n"
+    message += f"• Подтверждено панелью (304): {cache['not_modified']}\n"
+    message += f"• Совпало по хэшу ответа: {cache['unchanged']}\n"
+
+    await update.message.reply_text(text=message, parse_mode="Markdown")
+
+@check_admin
+async def show_metrics(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show panel API latency per endpoint, or send all metrics with /metrics prom"""
+    if context.args and context.args[0] == "prom":
+        await update.message.reply_document(
+            document=render_prometheus().encode(),
+            filename="metrics.txt"
+        )
+        return
+
+    series = sorted(API_LATENCY.labelled(), key=lambda item: item[1].count, reverse=True)
+    if not series:
+        await update.message.reply_text("📉 Запросов к панели ещё не было.")
+        return
+
+    errors = {}
+    for (method, endpoint, status), count in API_RESPONSES.collect().items():
+        if int(status) >= 400:
+            errors[(method, endpoint)] = errors.get((method, endpoint), 0) + count
+    for (method, endpoint, _), count in API_ERRORS.collect().items():
+        errors[(method, endpoint)] = errors.get((method, endpoint), 0) + count
+    sizes = {(labels["method"], labels["endpoint"]): s for labels, s in API_RESPONSE_SIZE.labelled()}
+
+    lines = []
+    for labels, latency in series[:METRICS_TOP_ENDPOINTS]:
+        key = (labels["method"], labels["endpoint"])
+        size = sizes.get(key)
+        avg_size = format_bytes(size.sum / size.count) if size and size.count else "-"
+        lines.append(f"{labels['method']} {labels['endpoint']}")
+        lines.append(
+            f"  n={latency.count} err={errors.get(key, 0)} "
+            f"p50={latency.quantile(0.5) * 1000:.0f} p95={latency.quantile(0.95) * 1000:.0f} "
+            f"p99={latency.quantile(0.99) * 1000:.0f} мс, ~{avg_size}"
+        )
+
+    message = "📈 *Запросы к панели*\n\n```\n" + "\n".join(lines) + "\n```"
+    message += "\nВсе метрики в формате Prometheus: /metrics prom"
+    await update.message.reply_text(text=message, parse_mode="Markdown")
+
+@check_admin
+async def start_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Profile the bot for N seconds: /profile [N] [pstats]"""
+    duration = DEFAULT_PROFILE_DURATION
+    use_pstats = False
+    for arg in context.args or []:
+        if arg.isdigit():
+            duration = int(arg)
+        elif arg == "pstats":
+            use_pstats = True
+    if not 1 <= duration <= MAX_DURATION:
+        await update.message.reply_text(f"❌ Длительность должна быть от 1 до {MAX_DURATION} секунд.")
+        return
+
+    await update.message.reply_text(f"⏱️ Профилирование на {duration} сек. запущено...")
+    # Run in the background so updates keep being processed while profiling
+    context.application.create_task(
+        _send_profile(context, update.effective_chat.id, duration, use_pstats),
+        update=update
+    )
+
+async def _send_profile(context, chat_id, duration, use_pstats):
+    """Collect a profile and send it as a document"""
+    try:
+        if use_pstats:
+            data, calls = await profile_event_loop(duration)
+            filename, caption = "profile.pstats", f"📄 pstats за {duration} сек., вызовов: {calls}"
+        else:
+            stacks, samples = await sample_event_loop(duration)
+            data = stacks.encode()
+            filename, caption = "profile.collapsed", f"🔥 Стеки за {duration} сек., выборок: {samples}"
+    except ProfilerBusyError:
+        await context.bot.send_message(chat_id, "⏳ Профилирование уже выполняется, дождитесь результата.")
+        return
+    except Exception as e:
+        logger.error(f"Error while profiling: {str(e)}")
+        await context.bot.send_message(chat_id, f"❌ Ошибка профилирования: {str(e)}")
+        return
+
+    await context.bot.send_document(chat_id, document=data or b"\n", filename=filename, caption=caption)
+
+@check_admin
+async def show_sessions(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show the admin sessions retaining the most memory"""
+    sessions = top_sessions(context.application, TOP_SESSIONS)
+    if not sessions:
+        await update.message.reply_text("🗂️ Активных сессий нет.")
+        return
+
+    lines = []
+    for user_id, size, idle, keys in sessions:
+        lines.append(f"{user_id}: ~{format_bytes(size)}, простой {idle / 60:.0f} мин.")
+        if keys:
+            lines.append(f"  {', '.join(keys)}")
+
+    message = "🗂️ *Сессии по объёму данных*\n\n```\n" + "\n".join(lines) + "\n```"
+    await update.message.reply_text(text=message, parse_mode="Markdown")
+
+def create_command_handlers():
+    """Create admin commands available outside of the menu conversation"""
+    return [
+        CommandHandler("panel", panel_status),
+        CommandHandler("metrics", show_metrics),
+        CommandHandler("profile", start_profile),
+        CommandHandler("sessions", show_sessions),
+    ]
@@ -10,11 +10,14 @@ from modules.config import (
     EDIT_USER, EDIT_FIELD, EDIT_VALUE, CREATE_USER, CREATE_USER_FIELD, USER_FIELDS
 )
 from modules.api.users import UserAPI
+from modules.api.snapshots import user_snapshots
 from modules.utils.formatters import format_bytes, format_user_details, escape_markdown
 from modules.handlers.start_handler import show_main_menu
 
 logger = logging.getLogger(__name__)
 
+USERS_PER_PAGE = 5
+
 async def show_users_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show users menu"""
     keyboard = [
@@ -100,13 +103,21 @@ async def handle_users_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     return USER_MENU
 
+def release_users_snapshot(context: ContextTypes.DEFAULT_TYPE):
+    """Let go of the user list snapshot of the session"""
+    snapshot_id = context.user_data.pop("users_snapshot", None)
+    if snapshot_id is not None:
+        user_snapshots.release(snapshot_id)
+
 async def list_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """List all users"""
     await update.callback_query.edit_message_text("📋 Загрузка списка пользователей...")
 
-    users = await UserAPI.get_all_users()
+    # The session keeps only the snapshot ID and its page, the users are shared
+    release_users_snapshot(context)
+    snapshot = await user_snapshots.open(USERS_PER_PAGE)
 
-    if not users or not users.get("users"):
+    if not snapshot:
         keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data="back_to_users")]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
@@ -116,28 +127,50 @@ async def list_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return USER_MENU
 
-    # Create a paginated list of users
-    users_per_page = 5
-    context.user_data["users"] = users["users"]
+    context.user_data["users_snapshot"] = snapshot.id
     context.user_data["current_page"] = 0
-    context.user_data["users_per_page"] = users_per_page
 
     await send_users_page(update, context)
     return SELECTING_USER
 
 async def send_users_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send a page of users"""
-    users = context.user_data["users"]
-    current_page = context.user_data["current_page"]
-    users_per_page = context.user_data["users_per_page"]
+    current_page = context.user_data.get("current_page", 0)
+    snapshot = user_snapshots.get(context.user_data.get("users_snapshot"))
+    users = await user_snapshots.page(snapshot, current_page) if snapshot else None
+    if users is None and (snapshot is None or user_snapshots.outdated(snapshot)):
+        # The snapshot is gone after a restart, or users were changed before this page was
+        # fetched: continue on a fresh snapshot instead of mixing two versions of the list
+        release_users_snapshot(context)
+        snapshot = await user_snapshots.open(USERS_PER_PAGE)
+        if snapshot is not None:
+            context.user_data["users_snapshot"] = snapshot.id
+            current_page = min(current_page, snapshot.page_count() - 1)
+            context.user_data["current_page"] = current_page
+            users = await user_snapshots.page(snapshot, current_page)
+
+    if users is None:
+        keyboard = [[InlineKeyboardButton("🔙 Назад в меню", callback_data="back_to_users")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        message = "❌ Ошибка при получении списка пользователей."
+
+        if update.callback_query:
+            await update.callback_query.edit_message_text(message, reply_markup=reply_markup)
+        else:
+            await update.message.reply_text(message, reply_markup=reply_markup)
+        return
+
+    total = snapshot.total
+    start_idx = current_page * snapshot.page_size
+    end_idx = start_idx + len(users)
 
-    start_idx = current_page * users_per_page
-    end_idx = min(start_idx + users_per_page, len(users))
+    # Fetch the next page while the admin reads this one
+    if end_idx < total:
+        context.application.create_task(user_snapshots.prefetch(snapshot, current_page + 1), update=update)
 
-    message = f"👥 *Пользователи* (Страница {current_page + 1}/{(len(users) + users_per_page - 1) // users_per_page}):\n\n"
+    message = f"👥 *Пользователи* (Страница {current_page + 1}/{snapshot.page_count()}):\n\n"
 
-    for i in range(start_idx, end_idx):
-        user = users[i]
+    for i, user in enumerate(users, start_idx):
         status_emoji = "✅" if user["status"] == "ACTIVE" else "❌"
         
         # Format expiration date
@@ -162,15 +195,14 @@ async def send_users_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if current_page > 0:
         nav_row.append(InlineKeyboardButton("◀️ Назад", callback_data="prev_page"))
 
-    if end_idx < len(users):
+    if end_idx < total:
         nav_row.append(InlineKeyboardButton("Вперед ▶️", callback_data="next_page"))
 
     if nav_row:
         keyboard.append(nav_row)
 
     # Add action buttons for each user
-    for i in range(start_idx, end_idx):
-        user = users[i]
+    for user in users:
         user_row = [
             InlineKeyboardButton(f"👤 {user['username']}", callback_data=f"view_{user['uuid']}")
         ]
@@ -211,11 +243,12 @@ async def handle_user_selection(update: Update, context: ContextTypes.DEFAULT_TY
         await send_users_page(update, context)
 
     elif data == "back_to_users":
+        release_users_snapshot(context)
         await show_users_menu(update, context)
         return USER_MENU
 
     elif data == "back_to_list":
-        if "users" in context.user_data:
+        if "users_snapshot" in context.user_data:
             await send_users_page(update, context)
         else:
             await show_users_menu(update, context)
@@ -319,7 +352,7 @@ async def handle_user_action(update: Update, context: ContextTypes.DEFAULT_TYPE)
     data = query.data
 
     if data == "back_to_list":
-        if "users" in context.user_data:
+        if "users_snapshot" in context.user_data:
             await send_users_page(update, context)
         else:
             await show_users_menu(update, context)
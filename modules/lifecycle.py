@@ -0,0 +1,72 @@
+import logging
+import secrets
+from telegram.ext import Application
+from telegram.request import HTTPXRequest
+
+from modules.config import (
+    TRACING_ENABLED, UPDATE_CONCURRENCY,
+    PERSISTENCE_ENABLED, PERSISTENCE_PATH, PERSISTENCE_UPDATE_INTERVAL,
+    WEBHOOK_URL, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH,
+    WEBHOOK_SECRET_TOKEN, WEBHOOK_CERT, WEBHOOK_KEY
+)
+from modules.api.client import init_client, close_client
+from modules.utils.monitoring import start_monitoring, stop_monitoring
+from modules.utils.outbound import OutboundQueueRequest
+from modules.utils.persistence import SQLitePersistence
+from modules.utils.sessions import start_session_sweeper, stop_session_sweeper
+from modules.utils.tracing import TracedRequest, close_exporter
+from modules.utils.update_processor import PerChatUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+# Same pool size the ApplicationBuilder uses for its default Bot API request
+BOT_CONNECTION_POOL_SIZE = 256
+
+def create_bot_request():
+    """Create the request object used for Bot API calls other than getUpdates"""
+    request = OutboundQueueRequest(HTTPXRequest(connection_pool_size=BOT_CONNECTION_POOL_SIZE))
+    if TRACING_ENABLED:
+        request = TracedRequest(request)
+    return request
+
+def create_update_processor():
+    """Create the processor running updates of different chats concurrently"""
+    return PerChatUpdateProcessor(UPDATE_CONCURRENCY)
+
+def create_persistence():
+    """Create the persistence of conversations and user data, None if disabled"""
+    if not PERSISTENCE_ENABLED:
+        return None
+    return SQLitePersistence(PERSISTENCE_PATH, update_interval=PERSISTENCE_UPDATE_INTERVAL)
+
+def webhook_settings():
+    """Get the arguments of run_webhook/start_webhook from the configuration"""
+    if not WEBHOOK_URL:
+        raise ValueError("WEBHOOK_URL must be set in webhook mode")
+    if bool(WEBHOOK_CERT) != bool(WEBHOOK_KEY):
+        raise ValueError("WEBHOOK_CERT and WEBHOOK_KEY must be set together")
+    # Without a configured token a random one is registered with Telegram on every start,
+    # requests without the matching X-Telegram-Bot-Api-Secret-Token header are rejected
+    secret_token = WEBHOOK_SECRET_TOKEN or secrets.token_urlsafe(32)
+    return {
+        "listen": WEBHOOK_LISTEN,
+        "port": WEBHOOK_PORT,
+        "url_path": WEBHOOK_PATH,
+        "webhook_url": f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}",
+        "secret_token": secret_token,
+        "cert": WEBHOOK_CERT or None,
+        "key": WEBHOOK_KEY or None,
+    }
+
+async def post_init(application: Application):
+    """Prepare shared resources before the bot starts processing updates"""
+    await init_client()
+    await start_monitoring(application)
+    start_session_sweeper(application)
+
+async def post_shutdown(application: Application):
+    """Release shared resources after the bot has stopped"""
+    await stop_session_sweeper()
+    await stop_monitoring()
+    await close_client()
+    close_exporter()
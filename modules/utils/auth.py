@@ -1,15 +1,41 @@
+import time
 from functools import wraps
 from modules.config import ADMIN_USER_IDS
+from modules.utils.metrics import REGISTRY
+from modules.utils.monitoring import current_handler, handler_finished
+from modules.utils.sessions import session_started, session_finished
+from modules.utils.tracing import span
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
 
+HANDLER_UPDATES = REGISTRY.counter("bot_handler_updates_total", "Updates processed per handler", ("handler",))
+HANDLER_ERRORS = REGISTRY.counter("bot_handler_errors_total", "Handlers that raised an exception", ("handler",))
+HANDLER_DURATION = REGISTRY.histogram("bot_handler_duration_seconds", "Handler execution time", ("handler",))
+
 def check_admin(func):
     """Decorator to check if user is admin"""
     @wraps(func)
     async def wrapped(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
-        user_id = update.effective_user.id
-        if user_id not in ADMIN_USER_IDS:
-            await update.message.reply_text("⛔ Вы не авторизованы для использования этого бота.")
-            return ConversationHandler.END
-        return await func(update, context, *args, **kwargs)
+        with span("auth.check_admin"):
+            user_id = update.effective_user.id
+            if user_id not in ADMIN_USER_IDS:
+                await update.message.reply_text("⛔ Вы не авторизованы для использования этого бота.")
+                return ConversationHandler.END
+        HANDLER_UPDATES.inc(handler=func.__name__)
+        data = update.callback_query.data if update.callback_query else getattr(update.effective_message, "text", None)
+        info = (func.__name__, data)
+        token = current_handler.set(info)
+        session_started(user_id)
+        started = time.perf_counter()
+        try:
+            with span(f"handler {func.__name__}", callback_data=data):
+                return await func(update, context, *args, **kwargs)
+        except Exception:
+            HANDLER_ERRORS.inc(handler=func.__name__)
+            raise
+        finally:
+            HANDLER_DURATION.observe(time.perf_counter() - started, handler=func.__name__)
+            current_handler.reset(token)
+            handler_finished(info)
+            session_finished(user_id)
     return wrapped
@@ -1,4 +1,5 @@
 from datetime import datetime
+from modules.utils.tracing import traced
 
 def format_bytes(bytes_value):
     """Format bytes to human-readable format"""
@@ -30,6 +31,7 @@ def escape_markdown(text):
     escape_chars = r'_*[]()~`>#+-=|{}.!'
     return ''.join(f'\\{c}' if c in escape_chars else c for c in str(text))
 
+@traced("format.user_details")
 def format_user_details(user):
     """Format user details for display"""
     try:
@@ -78,6 +80,7 @@ def format_user_details(user):
     
     return message
 
+@traced("format.node_details")
 def format_node_details(node):
     """Format node details for display"""
     status_emoji = "🟢" if node["isConnected"] and not node["isDisabled"] else "🔴"
@@ -115,6 +118,7 @@ def format_node_details(node):
 
     return message
 
+@traced("format.host_details")
 def format_host_details(host):
     """Format host details for display"""
     status_emoji = "🟢" if not host["isDisabled"] else "🔴"
@@ -146,6 +150,7 @@ def format_host_details(host):
     
     return message
 
+@traced("format.system_stats")
 def format_system_stats(stats):
     """Format system statistics for display"""
     message = f"*Статистика системы*\n\n"
@@ -188,6 +193,7 @@ def format_system_stats(stats):
 
     return message
 
+@traced("format.bandwidth_stats")
 def format_bandwidth_stats(stats):
     """Format bandwidth statistics for display"""
     message = f"*Статистика трафика*\n\n"
@@ -219,6 +225,7 @@ def format_bandwidth_stats(stats):
 
     return message
 
+@traced("format.inbound_details")
 def format_inbound_details(inbound):
     """Format inbound details for display"""
     message = f"*Информация об Inbound*\n\n"
@@ -0,0 +1,184 @@
+import math
+from collections import deque
+
+# Latency buckets in seconds and payload size buckets in bytes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Recent samples kept per series to compute percentiles
+RESERVOIR_SIZE = 1024
+
+class Metric:
+    """Labelled values, either recorded or read from a function when collected
+
+    The function returns a single value, or a dict of label value tuples
+    to values for labelled metrics.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=(), function=None):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self.values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def get(self, **labels):
+        """Get the value of a label set"""
+        return self.values.get(self._key(labels), 0)
+
+    def total(self):
+        """Get the sum over all label sets"""
+        return sum(self.collect().values())
+
+    def collect(self):
+        """Get the current values by label value tuple"""
+        if self.function is None:
+            return self.values
+        value = self.function()
+        return value if isinstance(value, dict) else {(): value}
+
+    def samples(self):
+        for key, value in self.collect().items():
+            if value is not None:
+                yield self.name, dict(zip(self.labelnames, key)), value
+
+class Counter(Metric):
+    """Monotonic counter"""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        """Increase the counter of a label set"""
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(Metric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        """Set the value of a label set"""
+        self.values[self._key(labels)] = value
+
+class HistogramSeries:
+    """Buckets, sum and recent samples of one label set"""
+
+    __slots__ = ("bucket_counts", "count", "sum", "reservoir")
+
+    def __init__(self, buckets):
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.reservoir = deque(maxlen=RESERVOIR_SIZE)
+
+    def quantile(self, q):
+        """Get a percentile of the recent samples"""
+        if not self.reservoir:
+            return 0.0
+        ordered = sorted(self.reservoir)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+class Histogram:
+    """Distribution of observed values with labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, value, **labels):
+        """Record a value for a label set"""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = HistogramSeries(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series.bucket_counts[i] += 1
+                break
+        series.count += 1
+        series.sum += value
+        series.reservoir.append(value)
+
+    def labelled(self):
+        """Iterate over (labels, series) pairs"""
+        for key, series in self.series.items():
+            yield dict(zip(self.labelnames, key)), series
+
+    def samples(self):
+        for labels, series in self.labelled():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series.bucket_counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_bucket", {**labels, "le": "+Inf"}, series.count
+            yield f"{self.name}_sum", labels, series.sum
+            yield f"{self.name}_count", labels, series.count
+
+class Registry:
+    """Collection of the process metrics"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def _register(self, metric):
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=(), function=None):
+        """Get or create a counter"""
+        return self._register(Counter(name, help_text, labelnames, function))
+
+    def gauge(self, name, help_text, labelnames=(), function=None):
+        """Get or create a gauge"""
+        return self._register(Gauge(name, help_text, labelnames, function))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        """Get or create a histogram"""
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+REGISTRY = Registry()
+
+def render_prometheus():
+    """Render the process metrics in the Prometheus text exposition format"""
+    return REGISTRY.render_prometheus()
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import os
+import time
+from contextvars import ContextVar
+from modules.config import (
+    METRICS_HOST, METRICS_PORT,
+    LOOP_MONITOR_ENABLED, LOOP_SLOW_CALLBACK_MS, LOOP_MONITOR_REPORT_INTERVAL
+)
+from modules.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Interval between event loop lag samples in seconds
+LOOP_LAG_INTERVAL = 0.5
+
+LOOP_LAG = REGISTRY.gauge("bot_event_loop_lag_seconds", "Delay of the last scheduled event loop wakeup")
+LOOP_LAG_HISTOGRAM = REGISTRY.histogram(
+    "bot_event_loop_lag_distribution_seconds", "Delay of scheduled event loop wakeups"
+)
+SLOW_CALLBACKS = REGISTRY.counter(
+    "bot_slow_callbacks_total", "Event loop callbacks that blocked the loop for too long", ("handler",)
+)
+
+# Handler name and callback data of the update being processed, set by check_admin
+current_handler = ContextVar("current_handler", default=None)
+# Handler that returned during the callback being run, whose context value is already reset
+_finished_handler = None
+
+# Slowest callbacks in the current report window, by handler
+SLOW_CALLBACKS_IN_REPORT = 5
+
+def _rss_bytes():
+    """Resident set size of the process"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak RSS is the best available without procfs
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def _open_fds():
+    """Open file descriptors, sockets to the panel and Telegram included"""
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+_started = time.monotonic()
+_lag_task = None
+_report_task = None
+_server = None
+_original_handle_run = None
+
+# Aggregates since the last summary
+_lag_window = {"samples": 0, "total": 0.0, "max": 0.0, "over_threshold": 0}
+_slow_window = {}
+
+REGISTRY.gauge("process_resident_memory_bytes", "Resident memory size in bytes", function=_rss_bytes)
+REGISTRY.gauge("process_open_fds", "Number of open file descriptors", function=_open_fds)
+REGISTRY.gauge("process_uptime_seconds", "Seconds since the bot started", function=lambda: time.monotonic() - _started)
+
+async def _sample_loop_lag():
+    """Measure how late the event loop wakes up a sleeping task"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + LOOP_LAG_INTERVAL
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lag = max(0.0, loop.time() - expected)
+        LOOP_LAG.set(lag)
+        LOOP_LAG_HISTOGRAM.observe(lag)
+        _lag_window["samples"] += 1
+        _lag_window["total"] += lag
+        _lag_window["max"] = max(_lag_window["max"], lag)
+        if lag * 1000 >= LOOP_SLOW_CALLBACK_MS:
+            _lag_window["over_threshold"] += 1
+
+def _describe_callback(handle):
+    """Get a readable name of the function run by an event loop handle"""
+    callback = handle._callback
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return getattr(coro, "__qualname__", repr(coro))
+    return getattr(callback, "__qualname__", repr(callback))
+
+def handler_finished(info):
+    """Remember a handler that returned, for a slow callback that ends with it"""
+    global _finished_handler
+    _finished_handler = info
+
+def _record_slow_callback(handle, duration):
+    """Log a callback that blocked the event loop and add it to the summary"""
+    context = handle._context
+    info = context.get(current_handler, None) if context is not None else None
+    handler, data = info or _finished_handler or ("-", None)
+    callback = _describe_callback(handle)
+    SLOW_CALLBACKS.inc(handler=handler)
+
+    logger.warning(
+        f"Slow callback blocked the event loop for {duration * 1000:.0f} ms: "
+        f"{callback} (handler: {handler}, data: {data})"
+    )
+    stats = _slow_window.get(handler)
+    if stats is None:
+        stats = _slow_window[handler] = {"count": 0, "total": 0.0, "max": 0.0, "callback": callback, "data": data}
+    stats["count"] += 1
+    stats["total"] += duration
+    if duration >= stats["max"]:
+        stats.update(max=duration, callback=callback, data=data)
+
+def _install_slow_callback_detector():
+    """Time every event loop callback by wrapping asyncio's Handle._run"""
+    global _original_handle_run
+    if _original_handle_run is not None:
+        return
+    _original_handle_run = original = asyncio.events.Handle._run
+    threshold = LOOP_SLOW_CALLBACK_MS / 1000
+
+    def _run(handle):
+        global _finished_handler
+        _finished_handler = None
+        started = time.perf_counter()
+        original(handle)
+        duration = time.perf_counter() - started
+        if duration >= threshold:
+            _record_slow_callback(handle, duration)
+
+    asyncio.events.Handle._run = _run
+
+def _uninstall_slow_callback_detector():
+    global _original_handle_run
+    if _original_handle_run is not None:
+        asyncio.events.Handle._run = _original_handle_run
+        _original_handle_run = None
+
+def _log_loop_summary():
+    """Log event loop lag and the slowest handlers since the last summary"""
+    samples = _lag_window["samples"]
+    average = _lag_window["total"] / samples if samples else 0.0
+    message = (
+        f"Event loop: average lag {average * 1000:.1f} ms, max {_lag_window['max'] * 1000:.0f} ms, "
+        f"{_lag_window['over_threshold']}/{samples} samples over {LOOP_SLOW_CALLBACK_MS:.0f} ms, "
+        f"{sum(stats['count'] for stats in _slow_window.values())} slow callbacks"
+    )
+    slowest = sorted(_slow_window.items(), key=lambda item: item[1]["total"], reverse=True)
+    for handler, stats in slowest[:SLOW_CALLBACKS_IN_REPORT]:
+        message += (
+            f"\n  {handler}: {stats['count']} slow, {stats['total'] * 1000:.0f} ms blocked, "
+            f"max {stats['max'] * 1000:.0f} ms in {stats['callback']} (data: {stats['data']})"
+        )
+    logger.info(message)
+
+    _lag_window.update(samples=0, total=0.0, max=0.0, over_threshold=0)
+    _slow_window.clear()
+
+async def _report_periodically():
+    while True:
+        await asyncio.sleep(LOOP_MONITOR_REPORT_INTERVAL)
+        _log_loop_summary()
+
+async def _handle_request(reader, writer):
+    """Answer a single HTTP request for the metrics page"""
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        # Skip the headers, nothing in them is needed
+        while True:
+            line = await asyncio.wait_for(reader.readline(), timeout=5)
+            if line in (b"\r\n", b"\n", b""):
+                break
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?", 1)[0] == "/metrics":
+            status, content_type = "200 OK", "text/plain; version=0.0.4; charset=utf-8"
+            body = REGISTRY.render_prometheus().encode()
+        else:
+            status, content_type, body = "404 Not Found", "text/plain; charset=utf-8", b"Not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    except Exception as e:
+        logger.error(f"Error serving metrics: {str(e)}")
+    finally:
+        writer.close()
+
+async def start_monitoring(application):
+    """Start the event loop lag sampler and, if configured, the loop monitor and metrics server"""
+    global _lag_task, _report_task, _server
+    REGISTRY.gauge(
+        "bot_update_queue_size", "Telegram updates waiting to be processed",
+        function=application.update_queue.qsize
+    )
+    if _lag_task is None:
+        _lag_task = asyncio.create_task(_sample_loop_lag())
+    if LOOP_MONITOR_ENABLED and _report_task is None:
+        _install_slow_callback_detector()
+        _report_task = asyncio.create_task(_report_periodically())
+        logger.info(f"Event loop monitor enabled, reporting callbacks slower than {LOOP_SLOW_CALLBACK_MS:.0f} ms")
+    if METRICS_PORT and _server is None:
+        try:
+            _server = await asyncio.start_server(_handle_request, METRICS_HOST, METRICS_PORT)
+            logger.info(f"Metrics available at http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        except OSError as e:
+            logger.error(f"Could not start the metrics server on {METRICS_HOST}:{METRICS_PORT}: {str(e)}")
+
+async def stop_monitoring():
+    """Stop the metrics server, the lag sampler and the loop monitor"""
+    global _lag_task, _report_task, _server
+    if _server is not None:
+        _server.close()
+        await _server.wait_closed()
+        _server = None
+    for task in (_lag_task, _report_task):
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    if _report_task is not None:
+        _log_loop_summary()
+        _uninstall_slow_callback_detector()
+    _lag_task = _report_task = None
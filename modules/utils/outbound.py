@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from telegram.request import BaseRequest
+from modules.api.scheduling import TokenBucket
+from modules.config import (
+    TELEGRAM_RATE_LIMIT, TELEGRAM_CHAT_RATE_LIMIT, TELEGRAM_CHAT_BURST,
+    TELEGRAM_FLOOD_RETRIES, TELEGRAM_FLOOD_MAX_WAIT
+)
+from modules.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Bot API methods that count against Telegram's message limits
+LIMITED_METHOD_PREFIXES = ("send", "edit", "copy", "forward")
+# Messages whose last rendered text and markup are remembered
+RENDERED_MESSAGES = 1024
+
+FLOOD_WAITS = REGISTRY.counter(
+    "bot_telegram_flood_waits_total", "Telegram 429 responses waited out and retried", ("method",)
+)
+EDITS_COALESCED = REGISTRY.counter(
+    "bot_telegram_edits_coalesced_total", "Message edits replaced by a later edit of the same message"
+)
+EDITS_SKIPPED = REGISTRY.counter(
+    "bot_telegram_edits_skipped_total", "Message edits not sent because the message already shows the content"
+)
+
+def _method_name(url):
+    return url.rsplit("/", 1)[-1]
+
+def _group_chat(chat_id):
+    """Check whether a chat is a group or channel, these have negative IDs or @usernames"""
+    if isinstance(chat_id, str) and chat_id.startswith("@"):
+        return True
+    try:
+        return int(chat_id) < 0
+    except (TypeError, ValueError):
+        return False
+
+def _retry_after(payload):
+    """Get the wait requested by a 429 response, None if it cannot be read"""
+    try:
+        return float(json.loads(payload)["parameters"]["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+def _fingerprint(request_data):
+    """Hash of the text, parse mode, markup and other options of an edit"""
+    rendered = json.dumps(request_data.parameters, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(rendered.encode(), digest_size=16).digest()
+
+class PendingEdit:
+    """Edit of a message waiting for its turn, replaced by later edits of the same message"""
+
+    __slots__ = ("args", "kwargs", "future", "followers")
+
+    def __init__(self, args, kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        self.future = asyncio.get_running_loop().create_future()
+        self.followers = 0
+
+class OutboundQueueRequest(BaseRequest):
+    """Bot API request wrapper pacing messages and edits to Telegram's limits
+
+    Sends and edits take a token from a global bucket, and messages sent to
+    a group or channel also one from a bucket of their chat, so bursts (bulk
+    job progress, reports) are spread out instead of running into flood
+    control. Edits and private chats skip the chat bucket, so an admin
+    clicking through inline keyboards is not slowed down. A 429 pauses the chat for the requested
+    `retry_after` and the call is retried. An edit still waiting for its turn
+    is replaced by a later edit of the same message, and both callers get the
+    result of the edit that was sent.
+
+    The fingerprint of the last text edit of each message is kept with
+    Telegram's answer, and an edit rendering the same content again is
+    answered from it without a call, instead of failing with "message is
+    not modified" after a round trip.
+    """
+
+    def __init__(self, request):
+        self._request = request
+        self._global = TokenBucket(TELEGRAM_RATE_LIMIT, max(1, int(TELEGRAM_RATE_LIMIT)))
+        self._chats = {}
+        # Chat ID to the monotonic time until which Telegram asked to wait
+        self._paused = {}
+        self._pending_edits = {}
+        # (chat ID, message ID) to the fingerprint and response of the last text edit
+        self._rendered = OrderedDict()
+        REGISTRY.counter(
+            "bot_telegram_throttled_total", "Telegram calls delayed by the outbound rate limits", ("scope",),
+            function=self._throttled
+        )
+
+    async def initialize(self):
+        await self._request.initialize()
+
+    async def shutdown(self):
+        await self._request.shutdown()
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(TELEGRAM_CHAT_RATE_LIMIT, TELEGRAM_CHAT_BURST)
+        return bucket
+
+    def _throttled(self):
+        return {
+            ("global",): self._global.throttled,
+            ("chat",): sum(bucket.throttled for bucket in self._chats.values()),
+        }
+
+    async def _take_turn(self, chat_id):
+        """Wait for a global token, and a token of the chat in groups and channels"""
+        if _group_chat(chat_id):
+            await self._chat_bucket(chat_id).acquire()
+        await self._global.acquire()
+
+    async def _wait_for_flood_control(self, chat_id):
+        paused_until = self._paused.get(chat_id)
+        if paused_until is None:
+            return
+        delay = paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        elif self._paused.get(chat_id) == paused_until:
+            del self._paused[chat_id]
+
+    async def _send(self, chat_id, url, *args, **kwargs):
+        """Send a call, waiting out and retrying 429 responses"""
+        method = _method_name(url)
+        for attempt in range(TELEGRAM_FLOOD_RETRIES + 1):
+            await self._wait_for_flood_control(chat_id)
+            code, payload = await self._request.do_request(url, *args, **kwargs)
+            if code != 429 or attempt == TELEGRAM_FLOOD_RETRIES:
+                return code, payload
+            retry_after = _retry_after(payload)
+            if retry_after is None or retry_after > TELEGRAM_FLOOD_MAX_WAIT:
+                return code, payload
+            FLOOD_WAITS.inc(method=method)
+            logger.warning(f"Telegram flood control on {method} for chat {chat_id}, retrying in {retry_after:.0f} s")
+            self._paused[chat_id] = max(self._paused.get(chat_id, 0), time.monotonic() + retry_after)
+        return code, payload
+
+    def _unchanged(self, message, name, request_data):
+        """Get the response of the last edit if it rendered the same content"""
+        rendered = self._rendered.get(message)
+        if name != "editMessageText" or rendered is None or rendered[0] != _fingerprint(request_data):
+            return None
+        self._rendered.move_to_end(message)
+        EDITS_SKIPPED.inc()
+        return rendered[1]
+
+    def _remember(self, message, name, request_data, result):
+        """Keep the fingerprint of an edit Telegram accepted"""
+        code, payload = result
+        if name != "editMessageText" or code != 200:
+            return
+        self._rendered[message] = (_fingerprint(request_data), result)
+        self._rendered.move_to_end(message)
+        if len(self._rendered) > RENDERED_MESSAGES:
+            self._rendered.popitem(last=False)
+
+    async def _edit(self, key, chat_id, url, args, kwargs):
+        """Send an edit, or join the pending edit of the same message"""
+        message, name = key[:2], key[2]
+        pending = self._pending_edits.get(key)
+        if pending is not None:
+            pending.args, pending.kwargs = (url, *args), kwargs
+            pending.followers += 1
+            EDITS_COALESCED.inc()
+            return await asyncio.shield(pending.future)
+
+        unchanged = self._unchanged(message, name, args[1])
+        if unchanged is not None:
+            return unchanged
+        pending = self._pending_edits[key] = PendingEdit((url, *args), kwargs)
+        # Sent in its own task, so callers that joined still get their edit if this caller is cancelled
+        task = asyncio.ensure_future(self._send_edit(key, chat_id, pending))
+        try:
+            return await asyncio.shield(pending.future)
+        except asyncio.CancelledError:
+            if not pending.followers:
+                if self._pending_edits.get(key) is pending:
+                    del self._pending_edits[key]
+                task.cancel()
+            raise
+
+    async def _send_edit(self, key, chat_id, pending):
+        """Send the latest version of a pending edit and resolve its future"""
+        message, name = key[:2], key[2]
+        try:
+            try:
+                await self._global.acquire()
+            finally:
+                # Later edits of the message are sent after this one
+                if self._pending_edits.get(key) is pending:
+                    del self._pending_edits[key]
+            request_data = pending.args[2]
+            result = self._unchanged(message, name, request_data)
+            if result is None:
+                # Forgotten while the edit is sent, so a racing edit is not compared with content being replaced
+                self._rendered.pop(message, None)
+                result = await self._send(chat_id, *pending.args, **pending.kwargs)
+                self._remember(message, name, request_data, result)
+        except asyncio.CancelledError:
+            pending.future.cancel()
+            raise
+        except Exception as e:
+            pending.future.set_exception(e)
+        else:
+            pending.future.set_result(result)
+
+    async def do_request(self, url, method, request_data=None, *args, **kwargs):
+        name = _method_name(url)
+        if name == "deleteMessage" and request_data is not None:
+            parameters = request_data.parameters
+            self._rendered.pop((parameters.get("chat_id"), parameters.get("message_id")), None)
+        if request_data is None or not name.startswith(LIMITED_METHOD_PREFIXES):
+            return await self._request.do_request(url, method, request_data, *args, **kwargs)
+
+        parameters = request_data.parameters
+        chat_id = parameters.get("chat_id")
+        message_id = parameters.get("message_id")
+        if name.startswith("edit") and chat_id is not None and message_id is not None:
+            return await self._edit((chat_id, message_id, name), chat_id, url, (method, request_data, *args), kwargs)
+
+        await self._take_turn(chat_id)
+        return await self._send(chat_id, url, method, request_data, *args, **kwargs)
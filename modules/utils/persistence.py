@@ -0,0 +1,243 @@
+import asyncio
+import hashlib
+import json
+import logging
+import pickle
+import sqlite3
+import threading
+from telegram.ext import BasePersistence, PersistenceInput
+
+logger = logging.getLogger(__name__)
+
+# Row ID of the single bot_data and callback_data rows
+SINGLE_ROW = 0
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS user_data (id INTEGER PRIMARY KEY, data BLOB NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS chat_data (id INTEGER PRIMARY KEY, data BLOB NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS bot_data (id INTEGER PRIMARY KEY, data BLOB NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS callback_data (id INTEGER PRIMARY KEY, data BLOB NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS conversations ("
+    "name TEXT NOT NULL, key TEXT NOT NULL, state BLOB NOT NULL, PRIMARY KEY (name, key))",
+)
+
+def _loads(blob, what):
+    try:
+        return pickle.loads(blob)
+    except Exception as e:
+        logger.error(f"Could not load persisted {what}: {str(e)}")
+        return None
+
+class SQLitePersistence(BasePersistence):
+    """Persistence of conversations and user, chat and bot data in SQLite
+
+    Every user, chat and conversation is its own row, so an update only
+    rewrites the rows it changed, and rows whose content did not change
+    are not written at all. Changes are collected, pickled and written in one
+    transaction per persistence run, off the event loop. The database runs
+    in WAL mode and is opened on first use; user and chat data are read
+    only when an update of that user or chat arrives.
+    """
+
+    def __init__(self, path, update_interval=60, store_data=None):
+        super().__init__(store_data=store_data or PersistenceInput(), update_interval=update_interval)
+        self.path = path
+        self._connection = None
+        # The connection is shared by the worker threads, one statement batch at a time
+        self._lock = threading.Lock()
+        # (table, key) to the content to write, or None to delete the row
+        self._pending = {}
+        # (table, key) to the digest of the content last written or read
+        self._written = {}
+        self._loaded = {"user_data": set(), "chat_data": set()}
+        self._flush_task = None
+        self.writes = 0
+
+    def _connect(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                connection.execute(statement)
+            connection.commit()
+            self._connection = connection
+            logger.info(f"Persistence database opened at {self.path}")
+        return self._connection
+
+    def _query(self, sql, parameters=()):
+        with self._lock:
+            return self._connect().execute(sql, parameters).fetchall()
+
+    async def _fetch(self, sql, parameters=()):
+        return await asyncio.to_thread(self._query, sql, parameters)
+
+    def _write(self, batch):
+        """Pickle the queued rows and write those whose content changed
+
+        Runs in a worker thread, so large user data is never pickled on the
+        event loop. Returns the number of rows written and the rows to queue
+        again because they changed while being pickled.
+        """
+        rows = {}
+        retry = {}
+        for row, value in batch.items():
+            if value is None:
+                rows[row] = None
+                continue
+            try:
+                blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            except RuntimeError:
+                # Changed size while being pickled, picked up on the next run
+                retry[row] = value
+                continue
+            digest = hashlib.blake2b(blob, digest_size=16).digest()
+            if self._written.get(row) != digest:
+                rows[row] = (blob, digest)
+
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                for (table, key), stored in rows.items():
+                    blob = stored[0] if stored is not None else None
+                    if table == "conversations":
+                        if blob is None:
+                            connection.execute("DELETE FROM conversations WHERE name = ? AND key = ?", key)
+                        else:
+                            connection.execute(
+                                "INSERT OR REPLACE INTO conversations (name, key, state) VALUES (?, ?, ?)",
+                                (*key, blob)
+                            )
+                    elif blob is None:
+                        connection.execute(f"DELETE FROM {table} WHERE id = ?", (key,))
+                    else:
+                        connection.execute(f"INSERT OR REPLACE INTO {table} (id, data) VALUES (?, ?)", (key, blob))
+        for row, stored in rows.items():
+            if stored is None:
+                self._written.pop(row, None)
+            else:
+                self._written[row] = stored[1]
+        return len(rows), retry
+
+    def _stage(self, table, key, value):
+        """Queue a row to be written; rows whose content did not change are skipped when written"""
+        # A shallow copy, so handlers adding or removing keys don't race the pickling thread
+        self._pending[(table, key)] = dict(value) if isinstance(value, dict) else value
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_pending())
+
+    async def _flush_pending(self):
+        """Write the queued rows, including those queued while writing"""
+        try:
+            while self._pending:
+                batch, self._pending = self._pending, {}
+                try:
+                    written, retry = await asyncio.to_thread(self._write, batch)
+                except sqlite3.Error as e:
+                    logger.error(f"Could not write {len(batch)} persisted rows: {str(e)}")
+                    for row, value in batch.items():
+                        self._pending.setdefault(row, value)
+                    # Retried on the next persistence run
+                    break
+                self.writes += written
+                for row, value in retry.items():
+                    self._pending.setdefault(row, value)
+                if retry:
+                    break
+        finally:
+            self._flush_task = None
+
+    async def get_user_data(self):
+        # Loaded per user in refresh_user_data
+        return {}
+
+    async def get_chat_data(self):
+        # Loaded per chat in refresh_chat_data
+        return {}
+
+    async def get_bot_data(self):
+        rows = await self._fetch("SELECT data FROM bot_data WHERE id = ?", (SINGLE_ROW,))
+        data = _loads(rows[0][0], "bot data") if rows else None
+        return data if data is not None else {}
+
+    async def get_callback_data(self):
+        rows = await self._fetch("SELECT data FROM callback_data WHERE id = ?", (SINGLE_ROW,))
+        return _loads(rows[0][0], "callback data") if rows else None
+
+    async def get_conversations(self, name):
+        rows = await self._fetch("SELECT key, state FROM conversations WHERE name = ?", (name,))
+        conversations = {}
+        for key, blob in rows:
+            state = _loads(blob, f"state of conversation {name}")
+            if state is not None:
+                conversations[tuple(json.loads(key))] = state
+                self._written[("conversations", (name, key))] = hashlib.blake2b(blob, digest_size=16).digest()
+        return conversations
+
+    async def update_conversation(self, name, key, new_state):
+        self._stage("conversations", (name, json.dumps(list(key))), new_state)
+
+    async def update_user_data(self, user_id, data):
+        self._loaded["user_data"].add(user_id)
+        self._stage("user_data", user_id, data)
+
+    async def update_chat_data(self, chat_id, data):
+        self._loaded["chat_data"].add(chat_id)
+        self._stage("chat_data", chat_id, data)
+
+    async def update_bot_data(self, data):
+        self._stage("bot_data", SINGLE_ROW, data)
+
+    async def update_callback_data(self, data):
+        self._stage("callback_data", SINGLE_ROW, data)
+
+    async def drop_user_data(self, user_id):
+        self._loaded["user_data"].add(user_id)
+        self._stage("user_data", user_id, None)
+
+    async def drop_chat_data(self, chat_id):
+        self._loaded["chat_data"].add(chat_id)
+        self._stage("chat_data", chat_id, None)
+
+    async def _refresh(self, table, key, data):
+        """Load a row into the data of its user or chat the first time it is used"""
+        loaded = self._loaded[table]
+        if key in loaded:
+            return
+        loaded.add(key)
+        rows = await self._fetch(f"SELECT data FROM {table} WHERE id = ?", (key,))
+        if not rows:
+            return
+        stored = _loads(rows[0][0], f"{table} of {key}")
+        self._written[(table, key)] = hashlib.blake2b(rows[0][0], digest_size=16).digest()
+        if stored:
+            # Values set before the first refresh win over the stored ones
+            for name, value in stored.items():
+                data.setdefault(name, value)
+
+    async def refresh_user_data(self, user_id, user_data):
+        await self._refresh("user_data", user_id, user_data)
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        await self._refresh("chat_data", chat_id, chat_data)
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    async def flush(self):
+        """Write everything still queued and close the database"""
+        if self._flush_task is not None:
+            await self._flush_task
+        if self._pending:
+            batch, self._pending = self._pending, {}
+            try:
+                _, retry = await asyncio.to_thread(self._write, batch)
+                if retry:
+                    # Handlers have stopped, nothing changes them any more
+                    await asyncio.to_thread(self._write, retry)
+            except sqlite3.Error as e:
+                logger.error(f"Could not write {len(batch)} persisted rows on shutdown: {str(e)}")
+        if self._connection is not None:
+            with self._lock:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,80 @@
+import asyncio
+import cProfile
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.005
+MAX_DURATION = 300
+
+_running = threading.Lock()
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is requested while another one is running"""
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+class SamplingProfiler(threading.Thread):
+    """Thread sampling the stack of another thread at a fixed interval"""
+
+    def __init__(self, thread_id, duration, interval=SAMPLE_INTERVAL):
+        super().__init__(name="sampling-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.duration = duration
+        self.interval = interval
+        self.samples = 0
+        self.stacks = Counter()
+
+    def run(self):
+        deadline = time.monotonic() + self.duration
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+            del frame
+            time.sleep(self.interval)
+
+    def collapsed(self):
+        """Render the samples as collapsed stacks, the input format of flamegraph tools"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+async def sample_event_loop(duration):
+    """Sample the event loop thread for a number of seconds and return collapsed stacks"""
+    if not _running.acquire(blocking=False):
+        raise ProfilerBusyError()
+    try:
+        profiler = SamplingProfiler(threading.get_ident(), duration)
+        profiler.start()
+        await asyncio.to_thread(profiler.join)
+        return profiler.collapsed(), profiler.samples
+    finally:
+        _running.release()
+
+async def profile_event_loop(duration):
+    """Run cProfile on the event loop thread for a number of seconds and return a pstats dump"""
+    if not _running.acquire(blocking=False):
+        raise ProfilerBusyError()
+    try:
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profile.disable()
+        stats = pstats.Stats(profile)
+        # Same content as Stats.dump_stats, without going through a file
+        return marshal.dumps(stats.stats), stats.total_calls
+    finally:
+        _running.release()
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import sys
+import time
+from collections import Counter
+from modules.api.snapshots import user_snapshots
+from modules.config import SESSION_TIMEOUT, SESSION_SWEEP_INTERVAL, SESSION_MEMORY_BUDGET
+from modules.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Keys the handlers can rebuild by fetching again, dropped first when a session is over its budget
+CACHED_SESSION_KEYS = ("current_user",)
+# State of a flow in progress, dropped only once the session is idle. The user list is part
+# of it: a session holds only the ID of its snapshot, which is shared and not counted here
+FLOW_SESSION_KEYS = (
+    "users_snapshot", "current_page", "search_type", "waiting_for", "action", "uuid", "add_hwid_uuid",
+    "edit_user", "edit_field", "create_user", "create_user_fields", "current_field_index",
+    "create_host", "create_host_step", "edit_host_field", "edit_host_uuid",
+)
+
+EVICTED_KEYS = REGISTRY.counter(
+    "bot_session_keys_evicted_total", "Session keys dropped from user_data", ("reason",)
+)
+
+_last_seen = {}
+_running = Counter()
+_sizes = {}
+_sweeper_task = None
+
+REGISTRY.gauge("bot_session_bytes", "Approximate size of all admin sessions", function=lambda: sum(_sizes.values()))
+
+def approximate_size(obj, seen=None):
+    """Approximate the memory retained by an object and everything it refers to"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approximate_size(key, seen) + approximate_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(item, seen) for item in obj)
+    elif not isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        for name in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, name):
+                size += approximate_size(getattr(obj, name), seen)
+        if hasattr(obj, "__dict__"):
+            size += approximate_size(obj.__dict__, seen)
+    return size
+
+def session_size(data):
+    """Approximate memory of a session's own data"""
+    return approximate_size(data)
+
+def session_started(user_id):
+    """Mark a session as in use by a running handler"""
+    _last_seen[user_id] = time.monotonic()
+    _running[user_id] += 1
+
+def session_finished(user_id):
+    _last_seen[user_id] = time.monotonic()
+    _running[user_id] -= 1
+    if _running[user_id] <= 0:
+        del _running[user_id]
+
+def _evict(application, user_id, data, key, reason):
+    value = data.pop(key)
+    if key == "users_snapshot":
+        user_snapshots.release(value)
+    EVICTED_KEYS.inc(reason=reason)
+    application.mark_data_for_update_persistence(user_ids=user_id)
+
+def sweep_sessions(application):
+    """Drop the state of idle sessions and the cached data of sessions over their budget"""
+    now = time.monotonic()
+    for user_id, data in list(application.user_data.items()):
+        if user_id in _running:
+            continue
+        idle = now - _last_seen.setdefault(user_id, now)
+        if SESSION_TIMEOUT and idle > SESSION_TIMEOUT:
+            for key in CACHED_SESSION_KEYS + FLOW_SESSION_KEYS:
+                if key in data:
+                    _evict(application, user_id, data, key, "idle")
+
+        size = session_size(data)
+        if SESSION_MEMORY_BUDGET and size > SESSION_MEMORY_BUDGET:
+            cached = sorted(
+                (key for key in CACHED_SESSION_KEYS if key in data),
+                key=lambda key: approximate_size(data[key]), reverse=True
+            )
+            for key in cached:
+                _evict(application, user_id, data, key, "budget")
+                size = session_size(data)
+                if size <= SESSION_MEMORY_BUDGET:
+                    break
+            else:
+                logger.warning(
+                    f"Session of {user_id} uses about {size} bytes, over the budget of "
+                    f"{SESSION_MEMORY_BUDGET} bytes, with a flow in progress"
+                )
+        _sizes[user_id] = size
+
+    for user_id in list(_last_seen):
+        if user_id not in application.user_data:
+            _last_seen.pop(user_id, None)
+            _sizes.pop(user_id, None)
+
+def top_sessions(application, limit=10):
+    """Get (user ID, approximate size, idle seconds, keys) of the largest sessions"""
+    now = time.monotonic()
+    sessions = [
+        (user_id, session_size(data), now - _last_seen.get(user_id, now), sorted(map(str, data)))
+        for user_id, data in list(application.user_data.items())
+    ]
+    sessions.sort(key=lambda session: session[1], reverse=True)
+    return sessions[:limit]
+
+async def _sweep_periodically(application):
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL)
+        try:
+            sweep_sessions(application)
+        except Exception as e:
+            logger.error(f"Error sweeping sessions: {str(e)}")
+
+def start_session_sweeper(application):
+    """Start sweeping idle and oversized sessions in the background"""
+    global _sweeper_task
+    if _sweeper_task is None and (SESSION_TIMEOUT or SESSION_MEMORY_BUDGET):
+        _sweeper_task = asyncio.create_task(_sweep_periodically(application))
+
+async def stop_session_sweeper():
+    global _sweeper_task
+    if _sweeper_task is not None:
+        _sweeper_task.cancel()
+        try:
+            await _sweeper_task
+        except asyncio.CancelledError:
+            pass
+        _sweeper_task = None
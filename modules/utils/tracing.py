@@ -0,0 +1,202 @@
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+from telegram.ext import ConversationHandler
+from telegram.request import BaseRequest
+from modules.config import TRACING_ENABLED, TRACE_EXPORT_PATH, TRACE_EXPORT_FORMAT
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "remnawave-admin-bot"
+
+# Span of the code currently running, the parent of new spans
+_current_span = ContextVar("current_span", default=None)
+# Timing of the conversation state lookup, taken in check_update and reported in handle_update
+_state_lookup = ContextVar("state_lookup", default=None)
+
+_export_file = None
+
+class Span:
+    """Timed operation within the trace of one update"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "end", "attributes", "_token")
+
+    def __init__(self, name, attributes=None, parent=None, start=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start = start if start is not None else time.time_ns()
+        self.end = None
+        self.attributes = dict(attributes or {})
+        self._token = None
+
+    def set(self, key, value):
+        """Set an attribute of the span"""
+        self.attributes[key] = value
+
+    def finish(self, end=None):
+        """End the span and export it"""
+        self.end = end if end is not None else time.time_ns()
+        _export(self)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        _current_span.reset(self._token)
+        self.finish()
+        return False
+
+class _NoopSpan:
+    """Stand-in used while tracing is disabled"""
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def span(name, **attributes):
+    """Start a span as a child of the current one, to be used as a context manager"""
+    if not TRACING_ENABLED:
+        return _NOOP_SPAN
+    return Span(name, attributes, parent=_current_span.get())
+
+def record_span(name, start, end, **attributes):
+    """Export a span timed by the caller without making it current"""
+    if not TRACING_ENABLED:
+        return
+    Span(name, attributes, parent=_current_span.get(), start=start).finish(end)
+
+def traced(name=None):
+    """Decorator running a function inside a span"""
+    def decorator(func):
+        span_name = name or func.__name__
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapped(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapped
+
+        @wraps(func)
+        def wrapped(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapped
+    return decorator
+
+def _to_jsonl(finished):
+    return {
+        "trace_id": finished.trace_id,
+        "span_id": finished.span_id,
+        "parent_id": finished.parent_id,
+        "name": finished.name,
+        "start": finished.start / 1e9,
+        "duration_ms": (finished.end - finished.start) / 1e6,
+        "attributes": finished.attributes,
+    }
+
+def _to_otlp(finished):
+    """Encode a span as an OTLP/JSON ExportTraceServiceRequest"""
+    otlp_span = {
+        "traceId": finished.trace_id,
+        "spanId": finished.span_id,
+        "name": finished.name,
+        "kind": 1,
+        "startTimeUnixNano": str(finished.start),
+        "endTimeUnixNano": str(finished.end),
+        "attributes": [
+            {"key": key, "value": {"stringValue": str(value)}} for key, value in finished.attributes.items()
+        ],
+    }
+    if finished.parent_id:
+        otlp_span["parentSpanId"] = finished.parent_id
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [otlp_span]}],
+        }]
+    }
+
+def _export(finished):
+    """Append a finished span to the trace file"""
+    global _export_file
+    try:
+        if _export_file is None:
+            _export_file = open(TRACE_EXPORT_PATH, "a", encoding="utf-8", buffering=1)
+        record = _to_otlp(finished) if TRACE_EXPORT_FORMAT == "otlp" else _to_jsonl(finished)
+        _export_file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    except OSError as e:
+        logger.error(f"Could not write trace span: {str(e)}")
+
+def close_exporter():
+    """Close the trace file"""
+    global _export_file
+    if _export_file is not None:
+        _export_file.close()
+        _export_file = None
+
+class TracedConversationHandler(ConversationHandler):
+    """ConversationHandler opening the root span of every update it handles
+
+    The span covers the conversation state lookup done in check_update and
+    the handler run by handle_update.
+    """
+
+    def check_update(self, update):
+        if not TRACING_ENABLED:
+            return super().check_update(update)
+        start = time.time_ns()
+        result = super().check_update(update)
+        _state_lookup.set((start, time.time_ns()) if result is not None else None)
+        return result
+
+    async def handle_update(self, update, application, check_result, context):
+        lookup = _state_lookup.get() if TRACING_ENABLED else None
+        if lookup is None:
+            return await super().handle_update(update, application, check_result, context)
+        _state_lookup.set(None)
+
+        start, end = lookup
+        root = Span("update", {"update_id": update.update_id, "conversation": self.name}, start=start)
+        if update.effective_user:
+            root.set("user_id", update.effective_user.id)
+        if update.callback_query:
+            root.set("callback_data", update.callback_query.data)
+        with root:
+            record_span("conversation.state_lookup", start, end, state=check_result[0])
+            return await super().handle_update(update, application, check_result, context)
+
+class TracedRequest(BaseRequest):
+    """Bot API request wrapper adding a span for every Telegram call"""
+
+    def __init__(self, request):
+        self._request = request
+
+    async def initialize(self):
+        await self._request.initialize()
+
+    async def shutdown(self):
+        await self._request.shutdown()
+
+    async def do_request(self, url, method, request_data=None, *args, **kwargs):
+        with span(f"telegram {url.rsplit('/', 1)[-1]}") as telegram_span:
+            if request_data is not None and "chat_id" in request_data.parameters:
+                telegram_span.set("chat_id", request_data.parameters["chat_id"])
+            code, payload = await self._request.do_request(url, method, request_data, *args, **kwargs)
+            telegram_span.set("status", code)
+            return code, payload
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+from modules.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Updates accepted from the queue at once, including those waiting for their chat
+MAX_PENDING_UPDATES = 256
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """Process updates of different chats concurrently and updates of one chat in order
+
+    Each chat has a lock taken in arrival order, so the conversation state of
+    an admin only ever changes one update at a time. At most `concurrency`
+    handlers run at once; updates waiting for their chat do not use a slot,
+    so one admin clicking during a slow bulk operation never holds up the others.
+    """
+
+    def __init__(self, concurrency):
+        super().__init__(max(concurrency, MAX_PENDING_UPDATES))
+        self.concurrency = concurrency
+        self._slots = asyncio.BoundedSemaphore(concurrency)
+        # Chat ID to [lock, updates holding or waiting for it]
+        self._chats = {}
+        self.running = 0
+        REGISTRY.gauge("bot_updates_running", "Updates being handled", function=lambda: self.running)
+        REGISTRY.gauge(
+            "bot_updates_waiting_for_chat", "Updates waiting for an earlier update of the same chat",
+            function=self.waiting
+        )
+
+    @staticmethod
+    def _chat_key(update):
+        if isinstance(update, Update):
+            if update.effective_chat:
+                return update.effective_chat.id
+            if update.effective_user:
+                return update.effective_user.id
+        return None
+
+    def waiting(self):
+        """Get the number of updates waiting for their chat lock"""
+        return sum(max(0, users - 1) for _, users in self._chats.values())
+
+    async def _run(self, coroutine):
+        async with self._slots:
+            self.running += 1
+            try:
+                await coroutine
+            finally:
+                self.running -= 1
+
+    async def do_process_update(self, update, coroutine):
+        key = self._chat_key(update)
+        if key is None:
+            await self._run(coroutine)
+            return
+
+        entry = self._chats.get(key)
+        if entry is None:
+            entry = self._chats[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await self._run(coroutine)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chats[key]
+
+    async def initialize(self):
+        logger.info(f"Processing updates concurrently, up to {self.concurrency} at once, in order per chat")
+
+    async def shutdown(self):
+        pass
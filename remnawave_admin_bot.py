@@ -6,6 +6,12 @@ from telegram.ext import Application
 
 # Import modules
 from modules.handlers.conversation_handler import create_conversation_handler
+from modules.handlers.status_handlers import create_command_handlers
+from modules.config import BOT_MODE
+from modules.lifecycle import (
+    post_init, post_shutdown, create_bot_request, create_update_processor, create_persistence,
+    webhook_settings
+)
 
 # Enable logging
 logging.basicConfig(
@@ -35,17 +41,48 @@ async def main():
         logger.warning("ADMIN_USER_IDS environment variable is not set. No users will be able to use the bot.")
     
     # Create the Application
-    application = Application.builder().token(bot_token).build()
+    application = (
+        Application.builder()
+        .token(bot_token)
+        .request(create_bot_request())
+        .concurrent_updates(create_update_processor())
+        .persistence(create_persistence())
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     
     # Create and add conversation handler
     conv_handler = create_conversation_handler()
     application.add_handler(conv_handler)
+    application.add_handlers(create_command_handlers())
     
+    if BOT_MODE == "webhook":
+        try:
+            settings = webhook_settings()
+        except ValueError as e:
+            logger.error(str(e))
+            return
+
     # Start the Bot
     logger.info("Starting bot...")
+    # post_init/post_shutdown only run automatically with run_polling(),
+    # so call them around the manual lifecycle here
     await application.initialize()
+    await application.post_init(application)
     await application.start()
-    await application.run_polling()
+    if BOT_MODE == "webhook":
+        await application.updater.start_webhook(**settings)
+        logger.info(f"Listening for webhook updates on {settings['listen']}:{settings['port']}/{settings['url_path']}")
+    else:
+        await application.updater.start_polling()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await application.updater.stop()
+        await application.stop()
+        await application.post_shutdown(application)
+        await application.shutdown()
 
 if __name__ == '__main__':
     try: